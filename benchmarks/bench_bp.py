@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+'''bench_bp.py - benchmark the bp() hot path across its option matrix
+
+Console output goes to an in-memory stream and file output to a temporary
+directory, so the numbers measure bp itself rather than the terminal.
+
+Run from the repository root:
+    python -m benchmarks.bench_bp                       # option matrix
+    python -m benchmarks.bench_bp --full                # x sizes x digits
+    python -m benchmarks.bench_bp -o new.json --compare old.json
+'''
+
+import argparse
+from datetime import datetime
+import io
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import betterprint.betterprint as bpmod
+from betterprint.colortext import Ct
+
+
+# ~~~ #                 -global variable-
+# the bp_dict settings restored before every case
+BASE_DICT = dict(bpmod.bp_dict)
+# console modes: (inl, fls)
+INLINE_MODES = {'eol': (0, 0), 'inl': (1, 0), 'inl+fls': (1, 1)}
+SIZES = (40, 400, 4000)
+DIGIT_DENSITIES = (0.0, 0.1, 0.5)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def make_message(size: int, density: float) -> list:
+    """Build a bp txt list of size characters in three color segments.
+
+    Args:
+        - size    (int): (required) total characters of text.
+        - density (float): (required) share of characters that are digits;
+                           each block of ten characters starts with a run.
+
+    Return:
+        - list: bp txt pairs
+    """
+    run = round(density * 10)
+    block = '0123456789'[:run] + 'abcdefghi '[run:]
+    text = (block * (size // 10 + 1))[:size]
+    third = max(size // 3, 1)
+    return [text[:third], Ct.a, text[third:2 * third], Ct.green,
+            text[2 * third:], Ct.a]
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def build_cases(full=False) -> list:
+    """Return the benchmark cases as dicts of bp_dict settings and bp kwargs.
+
+    Every option combination is run with the default message (400 characters,
+    10% digits); the default options are also run with every message size and
+    digit density. With full, every option combination gets every message.
+
+    Args:
+        - full (bool): (optional) cross every option combination with every
+                       message size and digit density.
+
+    Return:
+        - list: case dicts
+    """
+    options = [
+        {'num': num, 'date_log': date_log, 'color': color, 'inline': inline,
+         'log_file': log_file, 'error_log_file': elog, 'filtered': 0}
+        for num, date_log, color, inline, log_file, elog in itertools.product(
+            (0, 1), (0, 1), (0, 1), INLINE_MODES, (0, 1), (0, 1))
+    ]
+    # a filtered out veb call returns before any of the other options apply
+    options.append({
+        'num': 1, 'date_log': 1, 'color': 1, 'inline': 'eol', 'log_file': 1,
+        'error_log_file': 1, 'filtered': 1,
+    })
+    messages = list(itertools.product(SIZES, DIGIT_DENSITIES))
+    if full:
+        return [{**opt, 'size': size, 'density': density}
+                for opt in options for size, density in messages]
+    default = {'num': 1, 'date_log': 0, 'color': 1, 'inline': 'eol',
+               'log_file': 0, 'error_log_file': 0, 'filtered': 0}
+    cases = [{**opt, 'size': 400, 'density': 0.1} for opt in options]
+    cases.extend({**default, 'size': size, 'density': density}
+                 for size, density in messages
+                 if (size, density) != (400, 0.1))
+    return cases
+
+
+def case_name(case: dict) -> str:
+    """A stable, readable key for a case, used to match runs in --compare."""
+    return (
+        f'num={case["num"]} date={case["date_log"]} color={case["color"]} '
+        f'{case["inline"]} log={case["log_file"]} '
+        f'elog={case["error_log_file"]} filtered={case["filtered"]} '
+        f'size={case["size"]} digits={case["density"]}'
+    )
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def run_case(case: dict, tmp_dir: str, min_time: float) -> dict:
+    """Time one case and measure its allocations.
+
+    Args:
+        - case    (dict): (required) a case from build_cases.
+        - tmp_dir (str): (required) directory for the log files.
+        - min_time (float): (required) seconds to time the case for.
+
+    Return:
+        - dict: the case with calls_per_sec, ns_per_call, and
+                alloc_bytes_per_call added
+    """
+    bpmod.bp_shutdown()
+    bpmod.bp_dict.clear()
+    bpmod.bp_dict.update(BASE_DICT)
+    bpmod.bp_dict['color'] = case['color']
+    bpmod.bp_dict['date_log'] = case['date_log']
+    if case['log_file']:
+        bpmod.bp_dict['log_file'] = os.path.join(tmp_dir, 'bench.log')
+    if case['error_log_file']:
+        bpmod.bp_dict['error_log_file'] = os.path.join(tmp_dir, 'error.log')
+    inl, fls = INLINE_MODES[case['inline']]
+    txt = make_message(case['size'], case['density'])
+    # err=1 so error_log_file cases actually route to the error log
+    kwargs = {
+        'num': case['num'], 'inl': inl, 'fls': fls,
+        'err': 1 if case['error_log_file'] and not case['filtered'] else 0,
+        'veb': 3 if case['filtered'] else 0,
+    }
+    bp = bpmod.bp
+    sink = io.StringIO()
+    real_stdout = sys.stdout
+    sys.stdout = sink
+    try:
+        # calibrate so each timed batch runs for about a tenth of min_time
+        batch = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(batch):
+                bp(txt, **kwargs)
+            elapsed = time.perf_counter() - start
+            sink.seek(0)
+            sink.truncate()
+            if elapsed >= min_time / 10 or batch >= 1 << 20:
+                break
+            batch *= 2
+        calls = 0
+        total = 0.0
+        while total < min_time:
+            start = time.perf_counter()
+            for _ in range(batch):
+                bp(txt, **kwargs)
+            total += time.perf_counter() - start
+            calls += batch
+            sink.seek(0)
+            sink.truncate()
+        # peak memory above the baseline while a call runs, averaged
+        samples = 50
+        alloc = 0
+        tracemalloc.start()
+        for _ in range(samples):
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            bp(txt, **kwargs)
+            alloc += tracemalloc.get_traced_memory()[1] - base
+        tracemalloc.stop()
+        sink.seek(0)
+        sink.truncate()
+    finally:
+        sys.stdout = real_stdout
+        bpmod.bp_shutdown()
+    return {
+        **case,
+        'name': case_name(case),
+        'calls_per_sec': calls / total,
+        'ns_per_call': total / calls * 1e9,
+        'alloc_bytes_per_call': alloc / samples,
+    }
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def compare(results: list, baseline_path: str, threshold: float) -> int:
+    """Print the change from a saved run and count regressions.
+
+    Args:
+        - results (list): (required) this run's case results.
+        - baseline_path (str): (required) JSON file from an earlier run.
+        - threshold (float): (required) slowdown ratio counted as a regression.
+
+    Return:
+        - int: number of cases slower than the threshold
+    """
+    with open(baseline_path) as f:
+        baseline = {r['name']: r for r in json.load(f)['results']}
+    regressions = 0
+    print(f'\n{"case":<78}{"old ns":>10}{"new ns":>10}{"change":>9}')
+    for result in results:
+        old = baseline.get(result['name'])
+        if old is None:
+            continue
+        ratio = result['ns_per_call'] / old['ns_per_call']
+        flag = ''
+        if ratio > 1 + threshold:
+            regressions += 1
+            flag = '  REGRESSION'
+        print(f'{result["name"]:<78}{old["ns_per_call"]:>10.0f}'
+              f'{result["ns_per_call"]:>10.0f}'
+              f'{(ratio - 1) * 100:>8.1f}%{flag}')
+    return regressions
+
+
+def git_revision() -> str:
+    """The current git commit, or '' outside a git checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def main():
+    parser = argparse.ArgumentParser(
+        description='benchmark bp() across its option matrix')
+    parser.add_argument('--full', action='store_true',
+                        help='cross every option case with every message '
+                             'size and digit density')
+    parser.add_argument('--min-time', type=float, default=0.1,
+                        help='seconds to time each case for')
+    parser.add_argument('--filter', default='',
+                        help='only run cases whose name contains this text')
+    parser.add_argument('-o', '--output', metavar='<filename>',
+                        help='save results as JSON')
+    parser.add_argument('--compare', metavar='<filename>',
+                        help='compare against a saved JSON run')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='slowdown counted as a regression in --compare')
+    args = parser.parse_args()
+
+    cases = [c for c in build_cases(args.full) if args.filter in case_name(c)]
+    results = []
+    print(f'{"case":<78}{"calls/s":>12}{"ns/call":>10}{"alloc B":>10}')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for case in cases:
+            result = run_case(case, tmp_dir, args.min_time)
+            results.append(result)
+            print(f'{result["name"]:<78}{result["calls_per_sec"]:>12.0f}'
+                  f'{result["ns_per_call"]:>10.0f}'
+                  f'{result["alloc_bytes_per_call"]:>10.0f}')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'date': datetime.now().isoformat(timespec='seconds'),
+                'git': git_revision(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'results': results,
+            }, f, indent=1)
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        print(f'\n{regressions} regression(s) over '
+              f'{args.threshold * 100:.0f}%')
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
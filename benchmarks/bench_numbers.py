@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+'''bench_numbers.py - compare per-character and run-based number colorizing
+
+Run from the repository root:
+    python -m benchmarks.bench_numbers
+'''
+
+import timeit
+from betterprint.colortext import Ct
+from betterprint.render import color_numbers
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def color_numbers_per_char(txt: str, color: str) -> str:
+    """The original bp loop: one escape pair and one concatenation per digit.
+
+    Args:
+        - txt   (str): (required) text to highlight.
+        - color (str): (required) the Ct color the text is printed in.
+
+    Return:
+        - str: txt with every digit colorized
+    """
+    ttxt = ''
+    for idx in txt:
+        ttxt += f'{Ct.bblue}{idx}{color}' if idx.isdigit() else idx
+    return ttxt
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def main():
+    cases = {
+        'short, no digits': 'Finished with example_progress_bar.',
+        'short, few digits': 'This is error #4244 with no number color',
+        'long, sparse digits': 'row 1024 of the table is ready; ' * 40,
+        'long, dense digits': '12345 67890 2021-12-25 20:25:57 ' * 40,
+        # an ESC that starts no complete escape sequence
+        'stray escape': 'stray \x1b escape 5',
+        'partial escape': 'partial \x1b[12',
+        'cursor move': '\u001b[1000D42% | Progress...',
+    }
+    print(f'{"case":<22}{"len":>7}{"per-char us":>14}{"run us":>10}'
+          f'{"speedup":>10}{"bytes old":>12}{"bytes new":>12}')
+    for name, txt in cases.items():
+        # best of 5 repeats keeps scheduler noise out of the comparison
+        loops = 2000
+        old = min(timeit.repeat(
+            lambda: color_numbers_per_char(txt, Ct.a), number=loops, repeat=5))
+        new = min(timeit.repeat(
+            lambda: color_numbers(txt, Ct.a), number=loops, repeat=5))
+        print(f'{name:<22}{len(txt):>7}{old / loops * 1e6:>14.2f}'
+              f'{new / loops * 1e6:>10.2f}{old / new:>9.1f}x'
+              f'{len(color_numbers_per_char(txt, Ct.a)):>12}'
+              f'{len(color_numbers(txt, Ct.a)):>12}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,20 @@
 '''
 - betterprint
     - __init__.py           this file
+    - aio.py                asyncio API: abp, abp_nowait, aclose
     - betterprint.py        the better print (bp) module
-    - colortext.py          the colorized text module
+    - colortext.py          colors, color depth detection, ANSI stripping
+    - merge.py              k-way merge of bp log files (python -m betterprint.merge)
+    - mp.py                 multiprocess collector for bp output
+    - progress.py           frame-rate capped progress bars
+    - query.py              indexed log file queries (python -m betterprint.query)
+    - recorder.py           in-memory flight recorder dumped on errors
+    - render.py             text rendering helpers
+    - sinks.py              buffered log file sinks
+    - stats.py              counters and latency histograms for bp_stats
+    - storm.py              error storm deduplication and call site sampling
+    - structured.py         JSON Lines and binary structured log records
+    - template.py           precompiled bp templates (bp_compile)
+    - writer.py             background writer thread for async mode
     - version.py            better print (bp) version
 '''
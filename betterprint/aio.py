@@ -0,0 +1,230 @@
+'''aio.py v0.1.0'''
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import weakref
+import betterprint.betterprint as bpmod
+
+
+# ~~~ #                 -global variable-
+# one AsyncBp per event loop, used by abp, abp_nowait, and aclose
+_loop_writers = weakref.WeakKeyDictionary()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class AsyncBp:
+    """Better Print for asyncio code that never blocks the event loop.
+
+    Lines are formatted on the loop exactly as bp formats them (same txt
+    pairs, bp_dict settings, and counters), then queued. One flush task
+    hands everything queued, from every coroutine, to a single worker thread
+    that writes the batch with one write per sink. Lines keep the order in
+    which they were formatted.
+
+    The loop is held weakly. When a loop ends without aclose(), asyncio.run()
+    cancels the flush task; the lines still queued are then handed to the
+    worker thread, their futures are cancelled, and the loop, AsyncBp, and
+    worker thread are freed.
+    """
+    __slots__ = (
+        '_loop',
+        '_executor',
+        '_pending',
+        '_flush_task',
+        '_closed',
+    )
+
+    def __init__(self, loop=None):
+        self._loop = weakref.ref(loop or asyncio.get_running_loop())
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix='bp-aio')
+        self._pending = []
+        self._flush_task = None
+        self._closed = False
+
+    @property
+    def loop(self):
+        """The event loop this AsyncBp writes for."""
+        return self._loop()
+
+    def write(self, txt, wait=True, **kwargs):
+        """Format a bp line now and queue it for the worker thread.
+
+        Args:
+            - txt (list): (required) as in bp.
+            - wait (bool): (optional) return a future that completes once the
+                           line has been written. Defaults to True.
+            - **kwargs: bp keyword arguments.
+
+        Return:
+            - asyncio.Future or None: completes when written, if wait
+        """
+        if self._closed:
+            raise Exception('AsyncBp is closed')
+        records = bpmod._capture(txt, **kwargs)
+        if not records:
+            return None
+        future = self.loop.create_future() if wait else None
+        # any flight recorder dump goes ahead of the line
+        self._pending.extend((record, None) for record in records[:-1])
+        self._pending.append((records[-1], future))
+        if self._flush_task is None:
+            self._flush_task = self.loop.create_task(self._flush())
+            self._flush_task.add_done_callback(self._flush_done)
+        return future
+
+    async def flush(self):
+        """Wait until every queued line has been written."""
+        while self._flush_task is not None:
+            await asyncio.shield(self._flush_task)
+
+    async def aclose(self):
+        """Write everything queued, flush the log files, and stop the worker
+        thread."""
+        if self._closed:
+            return
+        self._closed = True
+        await self.flush()
+        await self.loop.run_in_executor(self._executor, bpmod.bp_flush)
+        self._executor.shutdown(wait=False)
+        if _loop_writers.get(self.loop) is self:
+            del _loop_writers[self.loop]
+
+    def __del__(self):
+        # the loop was closed without cancelling the flush task; the worker
+        # thread writes what is left rather than whatever thread runs the gc
+        if self._pending:
+            try:
+                self._executor.submit(
+                    bpmod._write_records,
+                    [record for record, _ in self._pending])
+            except RuntimeError:
+                # interpreter shutdown
+                pass
+        self._executor.shutdown(wait=False)
+
+    def _flush_done(self, task):
+        # a cancelled flush task means the loop is ending, even if the task
+        # never got to start
+        if task.cancelled():
+            self._abandon()
+
+    def _abandon(self):
+        """Cancel the futures of the queued lines, have the worker thread
+        write them after any batch it is still writing, and let go of the
+        loop."""
+        self._closed = True
+        self._flush_task = None
+        pending, self._pending = self._pending, []
+        for _, future in pending:
+            if future is not None:
+                future.cancel()
+        if pending:
+            self._executor.submit(bpmod._write_records,
+                                  [record for record, _ in pending])
+        # the loop is ending; waiting keeps these lines ahead of the next
+        # loop's
+        self._executor.shutdown(wait=True)
+        loop = self.loop
+        if loop is not None and _loop_writers.get(loop) is self:
+            del _loop_writers[loop]
+
+    async def _flush(self):
+        try:
+            while self._pending:
+                batch, self._pending = self._pending, []
+                try:
+                    # shielded: a cancelled flush task (the loop ending) must
+                    # not cancel a batch already taken off the queue
+                    await asyncio.shield(self.loop.run_in_executor(
+                        self._executor, bpmod._write_records,
+                        [record for record, _ in batch]))
+                except Exception as e:
+                    for _, future in batch:
+                        if future is not None and not future.done():
+                            future.set_exception(e)
+                    continue
+                for _, future in batch:
+                    if future is not None and not future.done():
+                        future.set_result(None)
+        finally:
+            self._flush_task = None
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _get_loop_writer() -> AsyncBp:
+    """Return the AsyncBp for the running event loop, creating it if needed."""
+    loop = asyncio.get_running_loop()
+    writer = _loop_writers.get(loop)
+    if writer is None:
+        writer = _loop_writers[loop] = AsyncBp(loop)
+    return writer
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+async def abp(txt, **kwargs):
+    """Async Better Print: await until the line has been written.
+
+    Example:
+        - await abp(['Hello', Ct.RED, 'world', Ct.A], veb=2)
+
+    Args:
+        - txt (list): (required) as in bp.
+        - **kwargs: bp keyword arguments (con, err, fil, fls, inl, log, num,
+                    veb).
+
+    Return:
+        - None
+    """
+    future = _get_loop_writer().write(txt, **kwargs)
+    if future is not None:
+        await future
+
+    return
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def abp_nowait(txt, **kwargs):
+    """Fire-and-forget Better Print from a coroutine or loop callback.
+
+    The line is formatted immediately and written in the background; use
+    aflush() or aclose() to wait for it.
+
+    Args:
+        - txt (list): (required) as in bp.
+        - **kwargs: bp keyword arguments.
+
+    Return:
+        - None
+    """
+    _get_loop_writer().write(txt, wait=False, **kwargs)
+
+    return
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+async def aflush():
+    """Wait until every line queued on this event loop has been written.
+
+    Return:
+        - None
+    """
+    writer = _loop_writers.get(asyncio.get_running_loop())
+    if writer is not None:
+        await writer.flush()
+
+    return
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+async def aclose():
+    """Write everything queued on this event loop, flush the log files, and
+    stop its worker thread. abp works again afterwards with a new one.
+
+    Return:
+        - None
+    """
+    writer = _loop_writers.get(asyncio.get_running_loop())
+    if writer is not None:
+        await writer.aclose()
+
+    return
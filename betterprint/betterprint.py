@@ -1,9 +1,27 @@
 #!/usr/bin/env python3
 
 
+import atexit
+from contextlib import contextmanager
 from datetime import datetime
+import itertools
+import os
 import sys
-from betterprint.colortext import Ct
+import threading
+import time
+from betterprint.colortext import (COLOR_DEPTH, Ct, palette, strip_ansi,
+                                   strip_sgr)
+from betterprint.recorder import FlightRecorder
+from betterprint.render import (color_chunks, color_numbers, escape_tail,
+                                iter_text)
+from betterprint.sinks import (close_sinks, flush_sinks, get_sink,
+                               release_sink, sink_counters)
+from betterprint.stats import reset as stats_reset
+from betterprint.stats import snapshot as stats_snapshot
+from betterprint.stats import stats
+from betterprint.storm import StormGuard, call_site, text_key
+from betterprint.structured import encode_binary, encode_jsonl
+from betterprint.writer import AsyncWriter
 import betterprint.version as version
 
 
@@ -14,13 +32,73 @@ bp_dict = {
     'bp_tracker_con': 0,        # tracks only bp cli calls
     'bp_tracker_log': 0,        # tracks only bp log_file calls
     'bp_tracker_elog': 0,       # tracks only bp elog_file calls
+    'async': 0,                 # 1 = write from a background thread
+    'async_overflow': 'block',  # block, drop-oldest, or drop-verbose
+    'async_queue_size': 10000,  # records queued before async_overflow
+    'thread_safe': 0,           # 1 = per-thread lines and counters
+    'stats': 0,                 # 1 = collect bp_stats() instrumentation
     'color': 1,                 # override cli color
+    'color_depth': None,        # auto, truecolor, 256, 16, none; None = as is
+    'inline_interval': 0,       # seconds between fls=1 console flushes
     'date_log': 0,              # prepend date to each output
     'log_file': None,           # the log file name for all output
     'error_log_file': None,     # the error log file name for only errors
+    'log_buffer_size': 65536,   # characters held before a log file write
+    'log_flush_interval': 1.0,  # seconds held before a log file write
+    'log_max_bytes': 0,         # rotate log files past this size; 0 = off
+    'log_rotate_interval': 0,   # rotate log files every N seconds; 0 = off
+    'log_backup_count': 5,      # rotated log file generations to keep
+    'log_compress': 1,          # gzip rotated log files in the background
+    'struct_log_file': None,    # structured log of every file output line
+    'struct_log_format': 'jsonl',   # jsonl or bin; see structured.py
+    'storm_key': None,          # dedup err > 0 lines by 'site' or 'text'
+    'storm_limit': 5,           # err lines per key written per storm_window
+    'storm_window': 10.0,       # seconds before "repeated N times" summary
+    'sample_veb': 3,            # veb at or above which sample_every applies
+    'sample_every': 1,          # write 1 in N of those calls per call site
+    'recorder_size': 0,         # lines kept in memory for bp_dump(); 0 = off
+    'recorder_verbose': 3,      # veb kept by the recorder but not printed
+    'stream_chunk_size': 65536,  # characters read at a time from a stream
     'quiet': 0,                 # allows surpressing cli errors
     'verbose': 0,               # match this verbose to bp veb; skip if lower
 }
+# background writer used when bp_dict['async'] == 1
+_writer = None
+_writer_lock = threading.Lock()
+# per-thread state: the open bp_batch() records, the thread_safe mode
+# counters, and the thread's unfinished in-line console text
+_local = threading.local()
+# thread_safe mode: every thread's [all, con, log, elog] counters, and the
+# shared con and log line number sequences
+_thread_counts_all = []
+_thread_counts_lock = threading.Lock()
+_seqs = None
+# serializes console writes in thread_safe mode
+_con_lock = threading.Lock()
+# inline_interval: monotonic time of the last console flush, and the timer
+# that flushes a held back fls=1 write
+_con_flushed = 0.0
+_con_timer = None
+# set by betterprint.mp in worker processes to send records to the collector
+_forward = None
+# sinks added with bp_add_sink: name -> (sink, needs, err_only), and how many
+# of them need each representation. The built in sinks need: console ->
+# 'con' ('file' when bp_dict['color'] == 0), log_file and error_log_file ->
+# 'file', struct_log_file -> 'struct'
+_added_sinks = {}
+# log_file, error_log_file, and struct_log_file keys holding an open file;
+# a key set back to a falsy value gives its file up on the next write
+_file_keys = set()
+_sink_needs = {'con': 0, 'file': 0, 'struct': 0}
+SINK_NEEDS = ('con', 'file', 'struct')
+# storm_key deduplication and sample_every state, and the timer that writes
+# the summaries of storms that have stopped
+_storm = StormGuard()
+_storm_timer = None
+# flight recorder used when bp_dict['recorder_size'] > 0, and the err value
+# that marks a record holding one of its dumps
+_recorder = None
+_DUMP = -1
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
@@ -33,15 +111,57 @@ def bp(txt: list, con=1, err=0, fil=1, fls=0, inl=0, log=1, num=1, veb=0):
     to be applied to the preceding string. There are pre-defined defaults that
     can be overwritten but not required.
 
+    With bp_dict['async'] = 1 the formatted line is queued for a background
+    writer thread instead of being written before bp returns. Use bp_flush()
+    to wait for queued output and bp_shutdown() to stop the writer.
+
+    With bp_dict['inline_interval'] = seconds, fls=1 console writes are
+    flushed at most once per interval; a timer flushes the last one, and
+    bp_flush() flushes it at once.
+
+    With bp_dict['thread_safe'] = 1 each thread's in-line (inl=1) text is held
+    until that thread ends the line, so lines from different threads are never
+    mixed, and the bp_tracker counters are kept per thread. Read them with
+    bp_trackers().
+
+    With bp_dict['storm_key'] = 'site' or 'text', err > 0 lines repeated from
+    the same call site, or with the same text once digits are ignored, are
+    limited to storm_limit per storm_window seconds. The rest are dropped and
+    reported as one "last message repeated N times" line when the window
+    ends, from a timer if no other line comes first. With
+    bp_dict['sample_every'] = N > 1, only 1 in N calls per call site with
+    veb >= sample_veb is written.
+
+    With bp_dict['recorder_size'] = N the last N lines, including lines up to
+    recorder_verbose that are not printed, are kept in memory. Every err=2
+    line and bp_dump() write them to the error log.
+
+    With bp_dict['color_depth'] = 'auto' (the depth detected for stdout at
+    import) or '256', '16', or 'none', console colors are downsampled through
+    a translation table built once per depth, and 'none' writes the console
+    like bp_dict['color'] == 0. Escape sequences inside the text are left out
+    of file output.
+
+    An even (text) entry can also be a file-like object or an iterable of str
+    or bytes chunks, such as a generator. The line is then written to each
+    sink chunk by chunk, see _bp_stream().
+
+    Txt can also be a callable returning that list. It is only called once
+    the verbosity checks pass, so expensive messages cost nothing when they are
+    filtered out. See bp_lazy() and is_enabled().
+
     Example:
         - bp(['Hello', Ct.RED, 'world', Ct.A, '!', Ct.GREEN], veb=2)
             - This prints "Hello world!" with the Hello in red, world in
             terminal default color, and the bang in green. This will also only
             print if args.verbose is set to "2" via "-vv".
+        - bp(lambda: [f'state: {expensive()}', Ct.A], veb=3)
+            - expensive() is only called when args.verbose is "3" or more.
 
     Args:
         - txt (list): (required) must be pairs with the even entries a string
-                      and odd sections the Ct.color to apply to that string.
+                      (or a stream) and odd sections the Ct.color to apply to
+                      that string, or a callable that returns such a list.
         - con  (int): (optional) 0 = no console output, 1 = console output.
                       (default)
         - err  (int): (optional) 0 = none (default), 1 = WARNING, 2 = ERROR:
@@ -72,13 +192,21 @@ def bp(txt: list, con=1, err=0, fil=1, fls=0, inl=0, log=1, num=1, veb=0):
         'file_out': '',
     }
 
-    # ~~~ #             -all print tracking-
-    # track function call even if no output
-    bp_dict['bp_tracker_all'] += 1
-
-    # ~~~ #             -validate verbosity-
-    if (err == 0 or bp_dict['quiet'] == 1) and bp_dict['verbose'] < veb:
+    # ~~~ #             -tracking and verbosity-
+    if not _count_call(err, veb):
+        # the flight recorder keeps more detail than is printed
+        if (bp_dict['recorder_size'] > 0
+                and veb <= bp_dict['recorder_verbose']):
+            if callable(txt):
+                txt = txt()
+            _record(f'{_prefix(err, log, veb)[1]}{_seg_text(txt)}')
         return      # skip higher veb as long as no errors or in quiet mode
+    t_start = time.perf_counter_ns() if bp_dict['stats'] == 1 else 0
+
+    # ~~~ #             -lazy txt-
+    # build the message only now that it is known to be needed
+    if callable(txt):
+        txt = txt()
 
     # ~~~ #             -validate txt list-
     # ensure each string has a color compliment within the list
@@ -88,94 +216,1228 @@ def bp(txt: list, con=1, err=0, fil=1, fls=0, inl=0, log=1, num=1, veb=0):
             f'"must be in pairs (txt length = {len(txt)}){Ct.a}'
         )
 
-    # ~~~ #             -veb-
-    # prepend INFO-L(x) to output
-    if veb > 0 and err == 0 and log > 0:
-        bp_local_dict['con_out'] = f'INFO-L{veb}: '
-        bp_local_dict['file_out'] = f'INFO-L{veb}: '
+    # ~~~ #             -storm-
+    # rate limit repeated warnings and errors
+    if err > 0 and bp_dict['storm_key'] and not _storm_allows(
+            err, _seg_text(txt)):
+        return
 
-    # ~~~ #             -err-
-    # pre-pend Error or Warning, overwriting -veb- section
-    if err == 1:
-        bp_local_dict['con_out'] = f'{Ct.yellow}WARNING: {Ct.a}'
-        bp_local_dict['file_out'] = 'WARNING: '
-    elif err == 2:
-        bp_local_dict['con_out'] = f'{Ct.red}ERROR: {Ct.a}'
-        bp_local_dict['file_out'] = 'ERROR: '
+    # ~~~ #             -representations-
+    # only render the text some active sink is going to write
+    need_con, need_file = _needs(con, err, fil)
+
+    # ~~~ #             -veb and err-
+    # prepend INFO-L(x), WARNING:, or ERROR: to output
+    con_prefix, file_prefix = _prefix(err, log, veb)
+    pal = _palette() if need_con else None
+    reset = Ct.a
+    num_color = Ct.bblue
+    if pal is not None:
+        con_prefix = pal.translate(con_prefix)
+        reset = pal[Ct.a]
+        num_color = pal[Ct.bblue]
+    bp_local_dict['con_out'] = con_prefix if need_con else None
+    bp_local_dict['file_out'] = file_prefix if need_file else None
 
     # ~~~ #             -colorize and assemble-
     # need enumerate to identify even entries that contain strings
     for idx, val in enumerate(txt):
         if idx % 2 == 0:
             if not isinstance(val, str):
-                raise Exception(
-                    f'{Ct.red}"Better Print" (bp) function -> "txt list even '
-                    f'entries must be str. txt type = {type(val)}{Ct.a}'
-                )
-            ttxt = ''               # even text val to be joined
-            ctxt = txt[idx + 1]     # odd color val to color ttxt
-            # colorize numbers and reset to default
-            if num == 1 and ctxt == Ct.a:
-                for idx in val[:]:
-                    ttxt += f'{Ct.bblue}{idx}{Ct.a}' if idx.isdigit() else idx
-            # colorize numbers and reset to requested color for that part
-            elif num == 1:
-                for idx in val[:]:
-                    ttxt += f'{Ct.bblue}{idx}{ctxt}' if idx.isdigit() else idx
-            # don't colorize numbers (equivalent to num=0)
+                # large text arrives as a stream and is written in chunks
+                _bp_stream(txt, con, err, fil, fls, inl, log, num, veb,
+                           t_start)
+                return
+            if need_con:
+                ctxt = txt[idx + 1]     # odd color val to color ttxt
+                if pal is not None:
+                    # downsample to the terminal's color depth
+                    ctxt = pal[ctxt]
+                    ttxt = pal.translate(val)
+                else:
+                    ttxt = val
+                # colorize numbers and reset to the requested color
+                if num == 1:
+                    ttxt = color_numbers(ttxt, ctxt, num_color)
+                # now wrap the color numbered string with the requested color
+                bp_local_dict['con_out'] += f'{ctxt}{ttxt}{reset}'
+            if need_file:
+                # file output is the original value with no console coloration
+                bp_local_dict['file_out'] += val[:]
+
+    _emit(bp_local_dict['con_out'], bp_local_dict['file_out'], txt, con, err,
+          fil, fls, inl, log, veb, t_start)
+
+    return
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _bp_stream(txt, con, err, fil, fls, inl, log, num, veb, t_start=0):
+    """bp for a txt list with streamed segments.
+
+    File-like objects are read stream_chunk_size characters at a time and
+    iterables are consumed chunk by chunk; each chunk is colorized (carrying
+    digit runs across chunk boundaries) and written to every sink before the
+    next is read, so memory stays bounded however large the text is. Prefix,
+    date_log, color, num, and the counters behave as in bp.
+
+    Inside bp_batch() or in a betterprint.mp worker the streams are read
+    whole and the line is handled like any other. In async mode queued lines
+    are written first to keep the order. Streamed lines are not written to
+    struct_log_file, and the flight recorder keeps '...' in their place. In
+    thread_safe mode the console is held for the whole line; log file lines
+    from other threads may still land between chunks.
+
+    Args:
+        - txt (list): (required) bp txt pairs with str or streamed text.
+        - con, err, fil, fls, inl, log, num, veb: as in bp.
+        - t_start (int): perf_counter_ns() when formatting began, or 0.
+    """
+    for val in txt[0::2]:
+        if not (isinstance(val, str) or hasattr(val, 'read') or (
+                hasattr(val, '__iter__')
+                and not isinstance(val, (bytes, dict)))):
+            raise Exception(
+                f'{Ct.red}"Better Print" (bp) function -> "txt list even '
+                f'entries must be str or a stream. txt type = {type(val)}'
+                f'{Ct.a}'
+            )
+    need_con, need_file = _needs(con, err, fil)
+    con_prefix, file_prefix = _prefix(err, log, veb)
+    chunk_size = bp_dict['stream_chunk_size']
+    pal = _palette() if need_con else None
+    reset = Ct.a
+    num_color = Ct.bblue
+    if pal is not None:
+        con_prefix = pal.translate(con_prefix)
+        reset = pal[Ct.a]
+        num_color = pal[Ct.bblue]
+
+    def pieces():
+        # (console chunk, file chunk) pairs; either may be ''
+        for idx in range(0, len(txt), 2):
+            val = txt[idx]
+            ctxt = txt[idx + 1]
+            chunks = (val,) if isinstance(val, str) else iter_text(
+                val, chunk_size)
+            if not need_con:
+                for chunk in chunks:
+                    yield ('', chunk)
+                continue
+            if pal is not None:
+                ctxt = pal[ctxt]
+                chunks = map(pal.translate, chunks)
+            yield (ctxt, '')
+            if num == 1:
+                yield from color_chunks(chunks, ctxt, num_color)
             else:
-                ttxt = val
-            # now wrap the color numbered string with the requested color
-            bp_local_dict['con_out'] += f'{ctxt}{ttxt}{Ct.a}'
-            # file output is the original value with no console coloration
-            bp_local_dict['file_out'] += val[:]
+                for chunk in chunks:
+                    yield (chunk, chunk)
+            yield (reset, '')
+
+    # ~~~ #             -whole-
+    # batches and mp workers hand on complete records
+    if _forward is not None or getattr(_local, 'records', None) is not None:
+        con_parts = [con_prefix]
+        file_parts = [file_prefix]
+        for con_chunk, file_chunk in pieces():
+            con_parts.append(con_chunk)
+            file_parts.append(file_chunk)
+        _emit(''.join(con_parts) if need_con else None,
+              ''.join(file_parts) if need_file else None, None, con, err, fil,
+              fls, inl, log, veb, t_start)
+        return
+
+    # ~~~ #             -head-
+    if bp_dict['recorder_size'] > 0:
+        if err == 2:
+            bp_dump()
+        _record(f'{file_prefix}{_seg_text(txt)}')
+    if _writer is not None:
+        _writer.flush()
+    # numbered and dated like a whole line, then written without its eol
+    record = _finish_record(con_prefix if need_con else None,
+                            file_prefix if need_file else None, None, con,
+                            err, fil, fls, 0, log, veb)
+    con_head = record[0][:-1] if record[0] is not None else None
+    file_head = record[1][:-1] if record[1] is not None else None
+    if t_start:
+        _stat_format(time.perf_counter_ns() - t_start)
+        t_start = time.perf_counter_ns()
+
+    # ~~~ #             -sinks-
+    con_writers = []
+    file_writers = []
+    file_sinks = []
+    if con_head is not None:
+        con_writers.append(sys.stdout.write)
+    for sink, needs, err_only in _added_sinks.values():
+        if needs == 'con' and con_head is not None:
+            con_writers.append(sink.write)
+        elif (needs == 'file' and file_head is not None
+              and (err > 0 or not err_only)):
+            file_writers.append(sink.write)
+    try:
+        if file_head is not None:
+            if bp_dict['log_file']:
+                file_sinks.append(_get_file_sink('log_file'))
+            if bp_dict['error_log_file'] and err > 0:
+                file_sinks.append(_get_file_sink('error_log_file'))
+            file_writers.extend(sink.write for sink in file_sinks)
+    except OSError as e:
+        bp([f'exception caught trying to open {bp_dict["log_file"]} or '
+            f'{bp_dict["error_log_file"]}\n\t{e}', Ct.red], err=1, fil=0)
+
+    # ~~~ #             -write-
+    # with color off the console writes the plain chunks
+    con_idx = 0 if need_con else 1
+    con_n = 0
+    file_n = 0
+    # escapes are stripped from the files, and colors from a console without
+    # color; an escape cut off at the end of a chunk waits for the next
+    con_carry = ''
+    file_carry = ''
+    locked = bp_dict['thread_safe'] == 1 and bool(con_writers)
+    if locked:
+        _con_lock.acquire()
+    try:
+        for write in con_writers:
+            write(con_head)
+        for write in file_writers:
+            write(file_head)
+        for piece in pieces():
+            con_chunk = piece[con_idx]
+            file_chunk = piece[1]
+            if con_chunk and con_writers:
+                if not need_con:
+                    con_chunk, con_carry = _strip_chunk(
+                        f'{con_carry}{con_chunk}', strip_sgr)
+                con_n += len(con_chunk)
+                for write in con_writers:
+                    write(con_chunk)
+            if file_chunk and file_writers:
+                file_chunk, file_carry = _strip_chunk(
+                    f'{file_carry}{file_chunk}', strip_ansi)
+                file_n += len(file_chunk)
+                for write in file_writers:
+                    write(file_chunk)
+        if con_carry:
+            for write in con_writers:
+                write(strip_sgr(con_carry))
+        if file_carry:
+            for write in file_writers:
+                write(strip_ansi(file_carry))
+        if inl == 0:
+            for write in con_writers:
+                write('\n')
+        for write in file_writers:
+            write('\n')
+        if fls == 1 and con_writers:
+            sys.stdout.flush()
+        if err > 0:
+            for sink in file_sinks:
+                sink.flush()
+    except OSError as e:
+        bp([f'exception caught trying to write a streamed line\n\t{e}',
+            Ct.red], err=1, fil=0)
+    finally:
+        if locked:
+            _con_lock.release()
+
+    # ~~~ #             -stats-
+    if t_start:
+        ns = time.perf_counter_ns() - t_start
+        stats['writes'] += 1
+        stats['write_ns'] += ns
+        stats['write_hist'][ns.bit_length()] += 1
+        sinks = stats['sinks']
+        if con_head is not None:
+            sinks['console']['lines'] += 1
+            sinks['console']['bytes'] += len(con_head) + con_n + 1 - inl
+            sinks['console']['flushes'] += fls
+        for sink in file_sinks:
+            key = 'log_file' if sink.path == bp_dict['log_file'] else (
+                'error_log_file')
+            sinks[key]['lines'] += 1
+            sinks[key]['bytes'] += len(file_head) + file_n + 1
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _strip_chunk(text: str, strip) -> tuple:
+    """Strip escapes from a streamed chunk, holding back an escape cut off
+    at its end, and return (stripped text, held text)."""
+    if '\x1b' not in text:
+        return (text, '')
+    end = escape_tail(text)
+    return (strip(text[:end]), text[end:])
+
+
+def _seg_text(txt: list) -> str:
+    """The plain text of txt, with '...' in place of streamed segments."""
+    return ''.join(val if isinstance(val, str) else '...'
+                   for val in txt[0::2])
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _count_call(err: int, veb: int) -> bool:
+    """Count a bp call in bp_tracker_all and check its verbosity.
+
+    Return:
+        - bool: False if the call is filtered out (and counted as such in
+                stats), True if it should be written
+    """
+    # track function call even if no output
+    if bp_dict['thread_safe'] == 1:
+        _thread_counts()[0] += 1
+    else:
+        bp_dict['bp_tracker_all'] += 1
+    if (err == 0 or bp_dict['quiet'] == 1) and bp_dict['verbose'] < veb:
+        if bp_dict['stats'] == 1:
+            filtered = stats['filtered']
+            filtered[veb] = filtered.get(veb, 0) + 1
+        return False
+    # sample verbose diagnostics per call site
+    if (bp_dict['sample_every'] > 1 and err == 0
+            and veb >= bp_dict['sample_veb']
+            and not _storm.sample(call_site(), bp_dict['sample_every'])):
+        if bp_dict['stats'] == 1:
+            stats['sampled'] += 1
+        return False
+    return True
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _storm_allows(err: int, text: str, key=None) -> bool:
+    """Check an err > 0 line against the storm_key rate limit, writing the
+    summaries of any storm windows that have ended first.
+
+    Args:
+        - err  (int): (required) the line's bp err.
+        - text (str): (required) the line's plain text.
+        - key       : (optional) dedup key used in 'text' mode instead of
+                      text with its digits normalized.
+
+    Return:
+        - bool: False if the line is suppressed
+    """
+    if getattr(_local, 'storm_summary', False):
+        return True
+    if bp_dict['storm_key'] == 'site':
+        key = call_site()
+    elif key is None:
+        key = text_key(text)
+    write, due = _storm.check(key, text, err, bp_dict['storm_limit'],
+                              bp_dict['storm_window'])
+    if due:
+        _storm_summaries(due)
+    if not write:
+        if bp_dict['stats'] == 1:
+            stats['suppressed'] += 1
+        # the summary is due when the window ends, even if no line follows
+        _storm_schedule(bp_dict['storm_window'])
+    return write
+
+
+def _storm_schedule(delay: float):
+    """Start the storm summary timer, unless it is already running."""
+    global _storm_timer
+    if _storm_timer is None:
+        _storm_timer = threading.Timer(delay, _storm_timer_summaries)
+        _storm_timer.daemon = True
+        _storm_timer.start()
+
+
+def _storm_timer_summaries():
+    """Timer callback: write the summaries of storm windows that have
+    ended, and wait for the next one with suppressed lines."""
+    global _storm_timer
+    _storm_timer = None
+    due, wait = _storm.expire(bp_dict['storm_window'])
+    if due:
+        _storm_summaries(due)
+    if wait is not None:
+        _storm_schedule(wait)
+
+
+def _storm_summaries(due: list):
+    """Write a "last message repeated N times" line per (err, count, text)."""
+    _local.storm_summary = True
+    try:
+        for err, count, text in due:
+            bp([f'last message repeated {count} times: {text}', Ct.a], err=err)
+    finally:
+        _local.storm_summary = False
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _needs(con: int, err: int, fil: int) -> tuple:
+    """Work out which representations of a line an active sink will write.
+
+    The console writes con_out, or file_out when bp_dict['color'] == 0 or
+    bp_dict['color_depth'] resolves to 'none'.
+    log_file, error_log_file (err > 0 only), the flight recorder, and sinks
+    added for 'file' write file_out; sinks added for 'con' write whatever the
+    console writes.
+
+    Return:
+        - tuple: (need_con, need_file) bools
+    """
+    color = _color_depth() != 'none'
+    need_con = con == 1 and color
+    need_file = bool(
+        (con == 1 and not color)
+        or bp_dict['recorder_size'] > 0
+        or (fil == 1 and (bp_dict['log_file'] or _sink_needs['file']
+                          or (err > 0 and bp_dict['error_log_file']))))
+    return (need_con, need_file)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _color_depth():
+    """Return the color depth the console is written at: 'none' when
+    bp_dict['color'] == 0, the detected depth for 'auto', or None when Ct
+    codes are written as they are."""
+    if bp_dict['color'] == 0:
+        return 'none'
+    depth = bp_dict['color_depth']
+    return COLOR_DEPTH if depth == 'auto' else depth
+
+
+def _palette():
+    """Return the translation table for the console color depth, or None
+    when colors are written unchanged."""
+    depth = _color_depth()
+    if depth is None or depth == 'none':
+        return None
+    return palette(depth)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _record(file_out: str):
+    """Keep a line in the flight recorder, sized from bp_dict."""
+    global _recorder
+    recorder = _recorder
+    if recorder is None or recorder.size != bp_dict['recorder_size']:
+        recorder = _recorder = FlightRecorder(bp_dict['recorder_size'])
+    recorder.record(time.time(), strip_ansi(file_out))
+
+
+def bp_dump():
+    """Write the flight recorder's lines to the error log and clear them.
+
+    The lines go to error_log_file, or log_file if there is no error log, or
+    stderr if neither is set. Called automatically on every err=2 line.
+
+    The dump is handed on like a bp line: sent to the collector from mp
+    workers, and queued inside bp_batch(), in async mode, and under abp, so
+    it is written just ahead of the error that follows it.
+
+    Return:
+        - None
+    """
+    recorder = _recorder
+    dump = recorder.take() if recorder is not None else ''
+    if not dump:
+        return
+    if _forward is not None:
+        _forward((None, dump, None, 0, _DUMP, 1, 1, 0, 0, 0, None))
+        return
+    record = (None, dump, _DUMP, 1, None, 0)
+    batch = getattr(_local, 'records', None)
+    if batch is not None:
+        batch.append(record)
+    elif bp_dict['async'] == 1:
+        _get_writer().put(record)
+    else:
+        _write_records([record])
+
+    return
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _prefix(err: int, log: int, veb: int) -> tuple:
+    """Return the (console, file) line prefix for err and veb: WARNING: or
+    ERROR: for errors, INFO-L(x) for verbose lines when log=1, else none."""
+    if err == 1:
+        return (f'{Ct.yellow}WARNING: {Ct.a}', 'WARNING: ')
+    if err == 2:
+        return (f'{Ct.red}ERROR: {Ct.a}', 'ERROR: ')
+    if veb > 0 and err == 0 and log > 0:
+        return (f'INFO-L{veb}: ', f'INFO-L{veb}: ')
+    return ('', '')
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _emit(con_out, file_out, txt, con, err, fil, fls, inl, log, veb,
+          t_start=0):
+    """Send an assembled line on: forward it from mp workers, collect it in
+    bp_batch(), queue it in async mode, or write it now.
+
+    Args:
+        - con_out  (str): colorized console text, prefix included, or None.
+        - file_out (str): plain file text, prefix included, or None.
+        - txt     (list): the bp txt list, kept for struct_log_file.
+        - con, err, fil, fls, inl, log, veb: as in bp.
+        - t_start  (int): perf_counter_ns() when formatting began, or 0 when
+                          stats are off.
+    """
+    # ~~~ #             -flight recorder-
+    # an error dumps the lines leading up to it, then starts a new recording
+    if bp_dict['recorder_size'] > 0:
+        if err == 2:
+            bp_dump()
+        _record(file_out)
+
+    # ~~~ #             -forward-
+    # worker processes send the record to the collector for numbering
+    if _forward is not None:
+        if t_start:
+            _stat_format(time.perf_counter_ns() - t_start)
+        _forward((con_out, file_out, time.time(), con, err, fil, fls, inl,
+                  log, veb, txt if bp_dict['struct_log_file'] else None))
+        return
+
+    # ~~~ #             -write-
+    # collect inside bp_batch(), hand off to the writer thread in async mode,
+    # otherwise write now
+    record = _finish_record(con_out, file_out, None, con, err, fil, fls, inl,
+                            log, veb, txt)
+    if t_start:
+        _stat_format(time.perf_counter_ns() - t_start)
+    batch = getattr(_local, 'records', None)
+    if batch is not None:
+        batch.append(record)
+    elif bp_dict['async'] == 1:
+        _get_writer().put(record)
+    else:
+        _write_out(record[0], record[1], record[1] if err > 0 else None, fls,
+                   err, _encode_struct(record) if record[4] else None)
+
+    return
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _finish_record(con_out, file_out, ts, con, err, fil, fls, inl, log, veb,
+                   txt=None):
+    """Apply the date_log prefix, color override, and tracker counters to an
+    assembled line and return the (con_txt, file_txt, err, fls, struct, veb)
+    record that gets written.
+
+    Args:
+        - con_out  (str): colorized console text, or None if not needed.
+        - file_out (str): plain file text, or None if not needed.
+        - ts     (float): time.time() of the bp call, or None for now.
+        - con, err, fil, fls, inl, log, veb: as in bp.
+        - txt     (list): the bp txt list, kept for struct_log_file.
+
+    Return:
+        - tuple: the record to write
+    """
+    # a flight recorder dump is written as it is
+    if err == _DUMP:
+        return (None, file_out, err, fls, None, veb)
+
+    # ~~~ #             -counters-
+    # thread_safe mode counts per thread and numbers lines from shared
+    # sequences, so no lock is taken here
+    if bp_dict['thread_safe'] == 1:
+        counts = _thread_counts()
+        con_n = next(_seqs[0]) if con == 1 else 0
+        log_n = next(_seqs[1]) if fil == 1 and bp_dict['log_file'] else 0
+    else:
+        counts = None
+        con_n = bp_dict['bp_tracker_con'] + 1
+        log_n = bp_dict['bp_tracker_log'] + 1
 
     # ~~~ #             -log-
     # allow log=0 to bypass this
     if bp_dict['date_log'] == 1 and log == 1:
-        dt_now = datetime.now().strftime('[%H:%M:%S]')
-        bp_local_dict['con_out'] = (
-            f'{dt_now}-{bp_dict["bp_tracker_con"] + 1}-{bp_local_dict["con_out"]}'
-        )
-        bp_local_dict['file_out'] = (
-            f'{dt_now}-{bp_dict["bp_tracker_log"] + 1}-{bp_local_dict["file_out"]}'
-        )
+        dt_now = (datetime.now() if ts is None
+                  else datetime.fromtimestamp(ts)).strftime('[%H:%M:%S]')
+        if con_out is not None:
+            con_out = f'{dt_now}-{con_n}-{con_out}'
+        if file_out is not None:
+            file_out = f'{dt_now}-{log_n}-{file_out}'
 
     # ~~~ #             -color-
-    # after all colorization sections, set cli to file if no color desired
-    if bp_dict['color'] == 0:
-        bp_local_dict['con_out'] = bp_local_dict['file_out'][:]
+    # after all colorization sections, set cli to file if no color desired;
+    # escapes in the text are kept for the console but not for the files
+    if _color_depth() == 'none':
+        con_out = file_out if file_out is None else strip_sgr(file_out)
+    if file_out is not None and '\x1b' in file_out:
+        file_out = strip_ansi(file_out)
 
     # ~~~ #             -con-
     # skips con output if con=0
-    if inl == 0 and con == 1:                   # default with new line
-        sys.stdout.write(f'{bp_local_dict["con_out"]}\n')
-        bp_dict['bp_tracker_con'] += 1
-    elif inl == 1 and fls == 0 and con == 1:    # in-line with no flush
-        sys.stdout.write(bp_local_dict['con_out'])
-        bp_dict['bp_tracker_con'] += 1
-    elif inl == 1 and fls == 1 and con == 1:    # in-line with flush
-        bp_dict['bp_tracker_con'] += 1
-        sys.stdout.write(bp_local_dict['con_out'])
-        sys.stdout.flush()
+    con_txt = None
+    if con == 1:
+        if counts is None:
+            bp_dict['bp_tracker_con'] += 1
+        else:
+            counts[1] += 1
+        # default with new line, or in-line without one
+        con_txt = con_out if inl == 1 else f'{con_out}\n'
+
+    # ~~~ #             -file-
+    # skip if fil=0 or file logging not requested
+    file_txt = None
+    if fil == 1:
+        if file_out is not None:
+            file_txt = f'{file_out}\n'
+        if bp_dict['log_file']:
+            if counts is None:
+                bp_dict['bp_tracker_log'] += 1
+            else:
+                counts[2] += 1
+        if bp_dict['error_log_file'] and err > 0:
+            if counts is None:
+                bp_dict['bp_tracker_elog'] += 1
+            else:
+                counts[3] += 1
+
+    # ~~~ #             -struct-
+    # keep the raw segments for the structured log
+    struct_rec = None
+    if fil == 1 and txt is not None and (bp_dict['struct_log_file']
+                                         or _sink_needs['struct']):
+        struct_rec = (time.time() if ts is None else ts,
+                      log_n if bp_dict['log_file'] else 0, txt)
+
+    # ~~~ #             -thread line-
+    # hold a thread's in-line fragments until its line ends, then emit the
+    # whole line at once so threads never interleave mid-line
+    if counts is not None and con_txt is not None:
+        pending = getattr(_local, 'line', None)
+        if inl == 1:
+            if pending is None:
+                _local.line = [con_txt]
+            else:
+                pending.append(con_txt)
+            con_txt = None
+        elif pending is not None:
+            _local.line = None
+            pending.append(con_txt)
+            con_txt = ''.join(pending)
+
+    return (con_txt, file_txt, err, fls, struct_rec, veb)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _thread_counts() -> list:
+    """Return this thread's [all, con, log, elog] counters for thread_safe
+    mode, registering them (and the shared line sequences) on first use."""
+    global _seqs
+    counts = getattr(_local, 'counts', None)
+    if counts is None:
+        counts = _local.counts = [0, 0, 0, 0]
+        with _thread_counts_lock:
+            _thread_counts_all.append(counts)
+            if _seqs is None:
+                _seqs = (itertools.count(bp_dict['bp_tracker_con'] + 1),
+                         itertools.count(bp_dict['bp_tracker_log'] + 1))
+    return counts
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def bp_trackers() -> dict:
+    """Return the bp_tracker counters, including the per-thread counts kept in
+    thread_safe mode that are not written back to bp_dict.
+
+    Return:
+        - dict: bp_tracker_all, bp_tracker_con, bp_tracker_log, and
+                bp_tracker_elog totals
+    """
+    keys = ('bp_tracker_all', 'bp_tracker_con', 'bp_tracker_log',
+            'bp_tracker_elog')
+    totals = [bp_dict[key] for key in keys]
+    with _thread_counts_lock:
+        for counts in _thread_counts_all:
+            for idx, val in enumerate(counts):
+                totals[idx] += val
+    return dict(zip(keys, totals))
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def is_enabled(veb=0, err=0) -> bool:
+    """Check whether a bp call with this veb and err would produce output.
+
+    Cheap enough to guard expensive blocks that only exist to feed bp.
+
+    Example:
+        - if is_enabled(3):
+              bp([f'cache: {dump_cache()}', Ct.A], veb=3)
+
+    Args:
+        - veb (int): (optional) 0-3: the verbosity the output needs.
+        - err (int): (optional) 0 = none (default), 1 = WARNING, 2 = ERROR.
+
+    Return:
+        - bool: True if the output would be written
+    """
+    return bp_dict['verbose'] >= veb or (err != 0 and bp_dict['quiet'] != 1)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def bp_lazy(txt, *args, con=1, err=0, fil=1, fls=0, inl=0, log=1, num=1,
+            veb=0, **kwargs):
+    """Better Print with deferred message construction.
+
+    Txt is either a callable, called as txt(*args, **kwargs), or a bp style
+    list whose even (text) entries are str.format templates filled with
+    args and kwargs. Either way the message is only built after the
+    verbosity checks pass.
+
+    Example:
+        - bp_lazy(['Creating bar using: {} | {}', Ct.BMAGENTA], symbol, width,
+                  veb=1)
+
+    Args:
+        - txt (list): (required) callable or template list, as above.
+        - *args, **kwargs: values used to build the message.
+        - con, err, fil, fls, inl, log, num, veb: as in bp.
+
+    Return:
+        - None
+    """
+    def build():
+        if callable(txt):
+            return txt(*args, **kwargs)
+        return [val.format(*args, **kwargs) if idx % 2 == 0 else val
+                for idx, val in enumerate(txt)]
+
+    # bp calls build only once the call passes its counting, verbosity, and
+    # sampling checks, and for the flight recorder
+    bp(build, con=con, err=err, fil=fil, fls=fls, inl=inl, log=log, num=num,
+       veb=veb)
+
+    return
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+@contextmanager
+def bp_batch():
+    """Collect every bp call made in this thread inside the with block and
+    write them with a single write per sink when the block exits.
+
+    Each line is still filtered, formatted, and numbered by bp as it is
+    called, so veb, err, date_log, color, and the bp_tracker counters behave
+    exactly as if the lines were written one by one. Nested batches are
+    written by the outermost one.
+
+    Example:
+        - with bp_batch():
+              for row in rows:
+                  bp([f'{row.name}: {row.count}', Ct.A])
+
+    Return:
+        - list: the records collected so far
+    """
+    outer = getattr(_local, 'records', None)
+    if outer is not None:
+        yield outer
+        return
+    records = _local.records = []
+    try:
+        yield records
+    finally:
+        _local.records = None
+        if records:
+            if bp_dict['async'] == 1:
+                writer = _get_writer()
+                for record in records:
+                    writer.put(record)
+            else:
+                _write_records(records)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _capture(txt, **kwargs) -> list:
+    """Run bp and return the records it built instead of writing them.
+
+    Args:
+        - txt (list): (required) as in bp.
+        - **kwargs: bp keyword arguments.
+
+    Return:
+        - list: zero records if filtered out, otherwise one, after a flight
+                recorder dump for an err=2 line
+    """
+    outer = getattr(_local, 'records', None)
+    records = _local.records = []
+    try:
+        bp(txt, **kwargs)
+    finally:
+        _local.records = outer
+    return records
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def bp_many(lines: list, **kwargs):
+    """Better Print many lines with a single write per sink.
+
+    Example:
+        - bp_many([['Name', Ct.BBLUE], ('Total: 12', Ct.A), ...], veb=1)
+        - bp_many([(['Oops', Ct.RED], {'err': 2}), ['Fine', Ct.A]])
+
+    Args:
+        - lines (list): (required) bp txt lists, or (txt, dict) pairs where
+                        the dict holds bp keyword arguments for that line.
+        - **kwargs:     bp keyword arguments applied to every line.
+
+    Return:
+        - None
+    """
+    with bp_batch():
+        for line in lines:
+            if len(line) == 2 and isinstance(line[1], dict):
+                bp(line[0], **{**kwargs, **line[1]})
+            else:
+                bp(line, **kwargs)
+
+    return
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _write_out(con_txt, log_txt, elog_txt, fls=0, err=0, struct_out=None,
+               struct_n=1):
+    """Write already formatted text to the console and log file sinks.
+
+    Args:
+        - con_txt  (str): console text, or None to skip the console.
+        - log_txt  (str): log_file text, or None to skip log_file.
+        - elog_txt (str): error_log_file text, or None to skip it.
+        - fls      (int): 1 = flush the console after writing.
+        - err      (int): > 0 flushes the log_file sink after writing.
+        - struct_out (str): encoded struct_log_file records (bytes for the
+                            'bin' format), or None to skip it.
+        - struct_n (int): number of records in struct_out.
+    """
+    t_start = time.perf_counter_ns() if bp_dict['stats'] == 1 else 0
+
+    # ~~~ #             -con-
+    flushed = 0
+    if con_txt:
+        if bp_dict['thread_safe'] == 1:
+            with _con_lock:
+                sys.stdout.write(con_txt)
+                if fls == 1:
+                    flushed = _con_flush()
+        else:
+            sys.stdout.write(con_txt)
+            if fls == 1:
+                flushed = _con_flush()
 
     # ~~~ #             -file-
     try:
-        # skip if file loging not requested or fil=0
-        if bp_dict['log_file'] and fil == 1:
-            with open(bp_dict['log_file'], 'a') as f:
-                f.write(bp_local_dict['file_out'] + '\n')
+        # skip if file loging not requested
+        if bp_dict['log_file']:
+            if log_txt:
+                _get_file_sink('log_file').write(log_txt, flush=err)
+        elif 'log_file' in _file_keys:
+            _release_file_sink('log_file')
         # separate errors into dedicated error log
-        if bp_dict['error_log_file'] and err > 0 and fil == 1:
-            with open(bp_dict['error_log_file'], 'a') as f:
-                f.write(bp_local_dict['file_out'] + '\n')
+        if bp_dict['error_log_file']:
+            if elog_txt:
+                _get_file_sink('error_log_file').write(elog_txt, flush=1)
+        elif 'error_log_file' in _file_keys:
+            _release_file_sink('error_log_file')
+        if bp_dict['struct_log_file']:
+            if struct_out:
+                _get_file_sink('struct_log_file').write(struct_out, flush=err)
+        elif 'struct_log_file' in _file_keys:
+            _release_file_sink('struct_log_file')
     except OSError as e:
-        bp([f'exception caught trying to write to {bp_dict["log_file"]} '
-            f'or {bp_dict["error_log_file"]}\n\t{e}', Ct.red], err=1, fil=0)
+        bp([f'exception caught trying to write to {bp_dict["log_file"]}, '
+            f'{bp_dict["error_log_file"]}, or {bp_dict["struct_log_file"]}'
+            f'\n\t{e}', Ct.red], err=1, fil=0)
+
+    # ~~~ #             -added sinks-
+    for name, (sink, needs, err_only) in _added_sinks.items():
+        if needs == 'con':
+            out = con_txt
+        elif needs == 'struct':
+            out = struct_out
+        else:
+            out = elog_txt if err_only else log_txt
+        if out:
+            try:
+                sink.write(out)
+            except OSError as e:
+                bp([f'exception caught trying to write to sink {name}\n\t{e}',
+                    Ct.red], err=1, fil=0)
+
+    # ~~~ #             -stats-
+    if t_start:
+        _stat_write(time.perf_counter_ns() - t_start, con_txt, log_txt,
+                    elog_txt, struct_out, struct_n, flushed)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _con_flush() -> int:
+    """Flush the console for an fls=1 write, at most once per inline_interval.
+
+    A flush that is due sooner is left to a timer, so fast in-line updates
+    (progress bars, percent counters) cost one flush per interval instead of
+    one per call, and the last update still shows within the interval. Lines
+    that end in a newline are flushed by a terminal's line buffering anyway.
+
+    Return:
+        - int: 1 if the console was flushed now, 0 if it was deferred
+    """
+    global _con_flushed, _con_timer
+    interval = bp_dict['inline_interval']
+    now = time.monotonic()
+    if interval <= 0 or now - _con_flushed >= interval:
+        _con_flushed = now
+        sys.stdout.flush()
+        return 1
+    if _con_timer is None:
+        _con_timer = threading.Timer(interval - (now - _con_flushed),
+                                     _con_timer_flush)
+        _con_timer.daemon = True
+        _con_timer.start()
+    return 0
+
+
+def _con_timer_flush():
+    """Timer callback: flush console output held back by _con_flush()."""
+    global _con_flushed, _con_timer
+    _con_timer = None
+    _con_flushed = time.monotonic()
+    try:
+        sys.stdout.flush()
+    except (OSError, ValueError):
+        pass
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _stat_format(ns: int):
+    """Count one formatted line and the ns it took for bp_stats()."""
+    stats['formatted'] += 1
+    stats['format_ns'] += ns
+    stats['format_hist'][ns.bit_length()] += 1
+
+
+def _stat_write(ns, con_txt, log_txt, elog_txt, struct_out, struct_n, fls):
+    """Count one _write_out pass, the ns it took, and what each sink got."""
+    stats['writes'] += 1
+    stats['write_ns'] += ns
+    stats['write_hist'][ns.bit_length()] += 1
+    sinks = stats['sinks']
+    if con_txt:
+        sinks['console']['lines'] += con_txt.count('\n')
+        sinks['console']['bytes'] += len(con_txt)
+        sinks['console']['flushes'] += fls
+    for key, txt in (('log_file', log_txt), ('error_log_file', elog_txt)):
+        if txt and bp_dict[key]:
+            sinks[key]['lines'] += txt.count('\n')
+            sinks[key]['bytes'] += len(txt)
+    if struct_out and bp_dict['struct_log_file']:
+        sinks['struct_log_file']['lines'] += struct_n
+        sinks['struct_log_file']['bytes'] += len(struct_out)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _get_file_sink(key: str):
+    """Return the FileSink for a bp_dict file key using the bp_dict settings.
+
+    Args:
+        - key (str): (required) 'log_file', 'error_log_file', or
+                     'struct_log_file'.
+    """
+    _file_keys.add(key)
+    return get_sink(
+        key, bp_dict[key], bp_dict['log_buffer_size'],
+        bp_dict['log_flush_interval'], bp_dict['log_max_bytes'],
+        bp_dict['log_rotate_interval'], bp_dict['log_backup_count'],
+        bp_dict['log_compress'],
+        key == 'struct_log_file' and bp_dict['struct_log_format'] == 'bin')
+
+
+def _release_file_sink(key: str):
+    """Write out and close the file of a bp_dict file key that has been
+    cleared, unless another key still writes to it.
+
+    Args:
+        - key (str): (required) 'log_file', 'error_log_file', or
+                     'struct_log_file'.
+    """
+    _file_keys.discard(key)
+    release_sink(key)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def bp_add_sink(name: str, sink, needs='file', err_only=0):
+    """Send bp output to another sink next to the console and log files.
+
+    A sink is any object with a write() method, such as an open file,
+    sys.stderr, or a socket wrapper; flush() is called by bp_flush() if it has
+    one. It declares the one representation it needs, and bp only renders a
+    representation when an active sink needs it:
+        - 'con':    the console text, colorized unless bp_dict['color'] == 0,
+                    for bp calls with con=1.
+        - 'file':   the plain text written to log_file, for calls with fil=1.
+        - 'struct': structured records encoded in struct_log_format.
+
+    Example:
+        - bp_add_sink('stderr', sys.stderr, needs='file', err_only=1)
+
+    Args:
+        - name  (str): (required) unique name, used by bp_remove_sink().
+        - sink      : (required) object with a write() method.
+        - needs (str): (optional) 'con', 'file' (default), or 'struct'.
+        - err_only (int): (optional) 1 = only err > 0 lines, like
+                          error_log_file. Only used with 'file'.
+
+    Return:
+        - None
+    """
+    if needs not in SINK_NEEDS:
+        raise Exception(
+            f'{Ct.red}"Better Print" (bp_add_sink) function -> "needs" must '
+            f'be one of {SINK_NEEDS}. needs = {needs}{Ct.a}'
+        )
+    # replace rather than mutate so writers iterating the old dict are safe
+    sinks = dict(_added_sinks)
+    sinks[name] = (sink, needs, err_only)
+    _set_added_sinks(sinks)
+
+    return
+
+
+def bp_remove_sink(name: str):
+    """Stop sending bp output to a sink added with bp_add_sink(). The sink
+    itself is left open.
+
+    Args:
+        - name (str): (required) the name it was added with.
+
+    Return:
+        - None
+    """
+    sinks = dict(_added_sinks)
+    sinks.pop(name, None)
+    _set_added_sinks(sinks)
+
+    return
+
+
+def _set_added_sinks(sinks: dict):
+    """Install a new added sink dict and recount what they need."""
+    global _added_sinks
+    counts = dict.fromkeys(SINK_NEEDS, 0)
+    for _, needs, _ in sinks.values():
+        counts[needs] += 1
+    _added_sinks = sinks
+    _sink_needs.update(counts)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _encode_struct(record: tuple):
+    """Encode a record's raw segments in the struct_log_format.
+
+    Args:
+        - record (tuple): (required) a record with a struct entry.
+
+    Return:
+        - str or bytes: the encoded structured record
+    """
+    ts, seq, txt = record[4]
+    if any('\x1b' in seg for seg in txt[0::2]):
+        # the odd entries are colors, encoded by name
+        txt = list(txt)
+        txt[0::2] = [strip_ansi(seg) for seg in txt[0::2]]
+    if bp_dict['struct_log_format'] == 'bin':
+        return encode_binary(ts, seq, record[2], record[5], txt)
+    return encode_jsonl(ts, seq, record[2], record[5], txt)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _write_records(records: list):
+    """Write a batch of (con_txt, file_txt, err, fls, struct, veb) records
+    with one write per sink, keeping the records in order within each sink.
+
+    Args:
+        - records (list): (required) records built by bp, and bp_dump()
+                          records.
+    """
+    con_out = []
+    log_out = []
+    elog_out = []
+    struct_out = []
+    fls = 0
+    err = 0
+    for record in records:
+        con_txt, file_txt, r_err, r_fls, r_struct, _ = record
+        if r_err == _DUMP:
+            # a flight recorder dump goes to the error log only
+            if bp_dict['error_log_file']:
+                elog_out.append(file_txt)
+            elif bp_dict['log_file']:
+                log_out.append(file_txt)
+            else:
+                sys.stderr.write(file_txt)
+                sys.stderr.flush()
+            err = 1
+            continue
+        if con_txt:
+            con_out.append(con_txt)
+            fls |= r_fls
+        if file_txt is not None:
+            log_out.append(file_txt)
+            if r_err > 0:
+                elog_out.append(file_txt)
+                err = 1
+        if r_struct is not None:
+            struct_out.append(_encode_struct(record))
+    _write_out(
+        ''.join(con_out), ''.join(log_out), ''.join(elog_out), fls, err,
+        (b'' if bp_dict['struct_log_format'] == 'bin' else '').join(struct_out),
+        len(struct_out))
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _get_writer():
+    """Return the running AsyncWriter, starting one from bp_dict if needed."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AsyncWriter(
+                    _write_records, bp_dict['async_queue_size'],
+                    bp_dict['async_overflow'])
+    return _writer
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def bp_flush():
+    """Write any queued or buffered output to the console and log files now.
+
+    Use it to force out the last in-line update held back by
+    bp_dict['inline_interval'].
+
+    In async mode this blocks until the writer thread has written everything
+    queued before the call. Buffered log output is also written automatically
+    on a size or time threshold, on every err > 0 line, and at interpreter
+    exit.
+
+    In thread_safe mode, any unfinished in-line text from the calling thread is
+    written out as well.
+
+    Return:
+        - None
+    """
+    global _con_flushed
+    pending = getattr(_local, 'line', None)
+    if pending:
+        _local.line = None
+        _write_out(''.join(pending), None, None)
+    if _writer is not None:
+        _writer.flush()
+    _con_flushed = time.monotonic()
+    sys.stdout.flush()
+    if bp_dict['stats'] == 1:
+        stats['sinks']['console']['flushes'] += 1
+    for key in [key for key in _file_keys if not bp_dict[key]]:
+        _release_file_sink(key)
+    flush_sinks()
+    for sink, _, _ in _added_sinks.values():
+        flush = getattr(sink, 'flush', None)
+        if flush is not None:
+            flush()
+
+    return
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def bp_stats() -> dict:
+    """Return a snapshot of the bp instrumentation.
+
+    Collected while bp_dict['stats'] == 1. Counters are updated without locks,
+    so with several threads writing at once they are close rather than exact.
+
+    The snapshot holds:
+        - formatted, writes: lines formatted and sink write passes.
+        - filtered: {veb: calls skipped by the verbosity check}.
+        - dropped: records discarded by the async_overflow policy.
+        - write_errors: async batches that failed to write.
+        - format_ns, write_ns: total ns spent formatting and writing, with
+          _avg_ns, _p50_ns, _p90_ns, and _p99_ns estimates, and the power of
+          two _hist histograms they come from.
+        - sinks: per sink lines, bytes (characters for text sinks), and
+          flushes; log files also report path and rotations.
+        - trackers: the bp_tracker counters, as from bp_trackers().
+
+    Return:
+        - dict: the stats snapshot
+    """
+    snap = stats_snapshot()
+    snap['dropped'] = _writer.dropped if _writer is not None else 0
+    snap['write_errors'] = _writer.errors if _writer is not None else 0
+    for key, counters in sink_counters().items():
+        if key in snap['sinks']:
+            snap['sinks'][key].update(counters)
+    snap['trackers'] = bp_trackers()
+
+    return snap
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def bp_stats_reset():
+    """Zero the bp_stats() counters and histograms.
+
+    Return:
+        - None
+    """
+    stats_reset()
+
+    return
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def bp_shutdown():
+    """Drain and stop the async writer thread, then flush and close the log
+    files. bp keeps working afterwards, starting a new writer if async mode is
+    still on. Registered to run at exit.
+
+    Return:
+        - None
+    """
+    global _writer, _storm_timer
+    timer, _storm_timer = _storm_timer, None
+    if timer is not None:
+        timer.cancel()
+    due = _storm.drain()
+    if due:
+        _storm_summaries(due)
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.shutdown()
+    sys.stdout.flush()
+    close_sinks()
 
     return
 
 
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _reset_after_fork():
+    """The writer thread and locks do not survive a fork; start fresh."""
+    global _writer, _writer_lock, _local, _thread_counts_lock, _con_lock
+    global _storm, _storm_timer
+    _writer = None
+    _writer_lock = threading.Lock()
+    _local = threading.local()
+    _thread_counts_lock = threading.Lock()
+    _con_lock = threading.Lock()
+    _storm = StormGuard()
+    _storm_timer = None
+
+
+atexit.register(bp_shutdown)
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 if __name__ == '__main__':
 
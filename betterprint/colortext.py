@@ -1,6 +1,31 @@
 '''colortext.py v0.1.1'''
 
 from dataclasses import dataclass
+import os
+import re
+import sys
+import unicodedata
+
+
+# ~~~ #                 -global variable-
+# terminal color depths, richest first
+COLOR_DEPTHS = ('truecolor', '256', '16', 'none')
+# any ANSI escape: CSI (cursor moves, colors, erase), OSC (titles, links), or
+# a two character escape
+_ANSI = re.compile(
+    r'\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])')
+# SGR (color and style) escapes only
+_SGR = re.compile(r'\x1b\[([0-9;]*)m')
+# xterm's default RGB for the 16 basic colors
+_BASIC_RGB = (
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0), (0, 0, 238),
+    (205, 0, 205), (0, 205, 205), (229, 229, 229), (127, 127, 127),
+    (255, 0, 0), (0, 255, 0), (255, 255, 0), (92, 92, 255), (255, 0, 255),
+    (0, 255, 255), (255, 255, 255),
+)
+_CUBE = (0, 95, 135, 175, 215, 255)
+# depth -> _Palette, each built once on first use
+_palettes = {}
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
@@ -74,3 +99,248 @@ Ct.grey10 = '\u001b[38;5;237m'
 Ct.grey12 = '\u001b[38;5;233m'
 Ct.orange = '\u001b[38;2;233;133;33m'
 Ct.brown = '\u001b[38;2;118;65;12m'
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def detect_color_depth(stream=None, env=None) -> str:
+    """Work out the color depth a terminal supports.
+
+    NO_COLOR disables color and FORCE_COLOR (0-3) sets the depth outright.
+    Otherwise a stream that is not a TTY, or TERM=dumb, gets 'none';
+    COLORTERM=truecolor/24bit and terminals known to support it get
+    'truecolor'; a TERM with 256 in it gets '256'; anything else '16'.
+
+    Args:
+        - stream: (optional) the output stream. Defaults to sys.stdout.
+        - env (dict): (optional) environment. Defaults to os.environ.
+
+    Return:
+        - str: one of COLOR_DEPTHS
+    """
+    env = os.environ if env is None else env
+    stream = sys.stdout if stream is None else stream
+    if env.get('NO_COLOR'):
+        return 'none'
+    force = env.get('FORCE_COLOR')
+    if force is not None:
+        forced = {'0': 'none', 'false': 'none', '1': '16', '2': '256',
+                  '3': 'truecolor'}.get(force.lower())
+        if forced is not None:
+            return forced
+    else:
+        try:
+            if not stream.isatty():
+                return 'none'
+        except (AttributeError, ValueError):
+            return 'none'
+    term = env.get('TERM', '')
+    if term == 'dumb':
+        return 'none'
+    if (env.get('COLORTERM', '').lower() in ('truecolor', '24bit')
+            or env.get('WT_SESSION')
+            or env.get('TERM_PROGRAM') in ('iTerm.app', 'WezTerm', 'vscode')):
+        return 'truecolor'
+    if '256' in term:
+        return '256'
+    return '16'
+
+
+# the depth of stdout when betterprint was imported
+COLOR_DEPTH = detect_color_depth()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class _Palette(dict):
+    """Escape sequence -> the same colors at a lower depth.
+
+    Every Ct color and all 256 indexed foreground colors are translated
+    when the palette is built; anything else is translated on first sight
+    and kept, so each lookup after that is a single dict hit.
+    """
+    __slots__ = ('depth',)
+
+    def __init__(self, depth: str):
+        super().__init__()
+        self.depth = depth
+        for name in ColorText.__slots__:
+            code = getattr(Ct, name, None)
+            if code is not None:
+                self[code] = self._convert(code)
+        for idx in range(256):
+            code = f'\u001b[38;5;{idx}m'
+            self[code] = self._convert(code)
+        self[''] = ''
+
+    def __missing__(self, code: str) -> str:
+        out = self[code] = self._convert(code)
+        return out
+
+    def translate(self, txt: str) -> str:
+        """Translate every color escape inside txt."""
+        if '\x1b' not in txt:
+            return txt
+        return _SGR.sub(lambda match: self[match.group()], txt)
+
+    def _convert(self, code: str) -> str:
+        return _SGR.sub(lambda match: _convert_sgr(match.group(1), self.depth),
+                        code)
+
+
+def _convert_sgr(params: str, depth: str) -> str:
+    """Rewrite the parameters of one SGR escape for depth."""
+    if depth == 'none':
+        return ''
+    codes = params.split(';') if params else ['0']
+    out = []
+    idx = 0
+    try:
+        while idx < len(codes):
+            code = codes[idx]
+            mode = codes[idx + 1] if idx + 1 < len(codes) else ''
+            if code not in ('38', '48') or mode not in ('2', '5'):
+                out.append(code)
+                idx += 1
+                continue
+            if mode == '5':
+                index = int(codes[idx + 2])
+                rgb = _index_rgb(index)
+                idx += 3
+            else:
+                index = None
+                rgb = tuple(int(val) for val in codes[idx + 2:idx + 5])
+                idx += 5
+            if depth == '256':
+                if index is None:
+                    index = _nearest_256(*rgb)
+                out.extend((code, '5', str(index)))
+            else:
+                if index is None or index > 15:
+                    index = _nearest_16(*rgb)
+                base = 30 if code == '38' else 40
+                out.append(str(base + index if index < 8
+                               else base + 60 + index - 8))
+    except (IndexError, ValueError):
+        return f'\u001b[{params}m'
+    return f'\u001b[{";".join(out)}m'
+
+
+def _index_rgb(index: int) -> tuple:
+    """RGB of an xterm 256 color index."""
+    if index < 16:
+        return _BASIC_RGB[index]
+    if index < 232:
+        index -= 16
+        return (_CUBE[index // 36], _CUBE[index // 6 % 6], _CUBE[index % 6])
+    grey = 8 + 10 * (index - 232)
+    return (grey, grey, grey)
+
+
+def _nearest_256(r: int, g: int, b: int) -> int:
+    """Closest xterm 256 color index to an RGB value."""
+    def level(val):
+        return min(range(6), key=lambda idx: abs(_CUBE[idx] - val))
+
+    cube = 16 + 36 * level(r) + 6 * level(g) + level(b)
+    grey = 232 + min(max(round((sum((r, g, b)) / 3 - 8) / 10), 0), 23)
+    return min((cube, grey), key=lambda idx: _distance(_index_rgb(idx),
+                                                        (r, g, b)))
+
+
+def _nearest_16(r: int, g: int, b: int) -> int:
+    """Closest basic color index to an RGB value."""
+    return min(range(16), key=lambda idx: _distance(_BASIC_RGB[idx],
+                                                     (r, g, b)))
+
+
+def _distance(one: tuple, two: tuple) -> int:
+    return sum((a - b) ** 2 for a, b in zip(one, two))
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def palette(depth: str):
+    """Return the translation table for depth, building it on first use.
+
+    Args:
+        - depth (str): (required) one of COLOR_DEPTHS.
+
+    Return:
+        - _Palette or None: None for 'truecolor', where nothing changes
+    """
+    if depth == 'truecolor':
+        return None
+    table = _palettes.get(depth)
+    if table is None:
+        if depth not in COLOR_DEPTHS:
+            raise Exception(
+                f'{Ct.red}color depth must be one of {COLOR_DEPTHS}. depth = '
+                f'{depth}{Ct.a}'
+            )
+        table = _palettes[depth] = _Palette(depth)
+    return table
+
+
+def translate(txt: str, depth: str) -> str:
+    """Rewrite every color escape in txt for a terminal of depth.
+
+    Args:
+        - txt   (str): (required) text with color escapes.
+        - depth (str): (required) one of COLOR_DEPTHS.
+
+    Return:
+        - str: the translated text
+    """
+    table = palette(depth)
+    return txt if table is None else table.translate(txt)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def strip_ansi(txt: str) -> str:
+    """Remove every ANSI escape sequence from txt in a single pass.
+
+    Args:
+        - txt (str): (required) text that may hold escapes.
+
+    Return:
+        - str: the plain text
+    """
+    return _ANSI.sub('', txt) if '\x1b' in txt else txt
+
+
+def strip_sgr(txt: str) -> str:
+    """Remove the color and style escapes from txt, keeping the others
+    (such as cursor moves) for a console without color.
+
+    Args:
+        - txt (str): (required) text that may hold escapes.
+
+    Return:
+        - str: the uncolored text
+    """
+    return _SGR.sub('', txt) if '\x1b' in txt else txt
+
+
+def display_width(txt: str) -> int:
+    """Return the number of terminal columns txt takes up.
+
+    Escape sequences, control characters, and combining or zero width
+    characters take none; East Asian wide and fullwidth characters take two.
+
+    Args:
+        - txt (str): (required) the text.
+
+    Return:
+        - int: the width in columns
+    """
+    if '\x1b' in txt:
+        txt = _ANSI.sub('', txt)
+    if txt.isascii() and txt.isprintable():
+        return len(txt)
+    width = 0
+    for char in txt:
+        if char.isascii():
+            width += char.isprintable()
+        elif unicodedata.category(char) in ('Mn', 'Me', 'Cf', 'Cc'):
+            continue
+        else:
+            width += 2 if unicodedata.east_asian_width(char) in 'WF' else 1
+    return width
@@ -0,0 +1,232 @@
+'''merge.py v0.1.0
+
+Merge the date_log bp log files of many processes into one timeline. Each
+file's lines look like
+    [12:01:02]-1534-ERROR: text
+
+The files, plain or gzip compressed, are read line by line and merged with a
+heap on (time, sequence number), so only the current record of each file is
+held in memory however large the files are. Records below a level can be
+left out.
+
+With --dedup a record found in more than one file (the same time, sequence
+number, and text) is written once, for merging a log_file with its
+error_log_file or overlapping copies of one log. Leave it off for the logs of
+separate processes: each numbers its lines from 1, so two processes that log
+the same text in the same second would lose a line.
+
+Run from the command line:
+    python -m betterprint.merge worker-*.log app.log.1.gz -o merged.log.gz
+    python -m betterprint.merge *.log --min-level warning
+    python -m betterprint.merge app.log app.err --dedup
+'''
+
+import argparse
+import gzip
+import heapq
+import os
+import sys
+from betterprint.betterprint import bp
+from betterprint.colortext import Ct
+from betterprint.query import DAY, LEVEL_BITS, LEVELS, RECORD
+
+
+# ~~~ #                 -global variable-
+# level name -> rank; --min-level keeps records ranked at or above it
+SEVERITY = {'info': 0, 'none': 1, 'warning': 2, 'error': 3}
+# query level bit -> rank
+_BIT_RANK = {LEVELS[name]: rank for name, rank in SEVERITY.items()}
+_GZIP_MAGIC = b'\x1f\x8b'
+_READ_BUFFER = 1 << 20
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def open_log(path: str):
+    """Open a bp log file for reading bytes, decompressing gzip files.
+
+    Args:
+        - path (str): (required) the log file.
+
+    Return:
+        - file: a binary file object
+    """
+    with open(path, 'rb') as f:
+        gz = f.read(2) == _GZIP_MAGIC
+    if gz:
+        return gzip.open(path, 'rb')
+    return open(path, 'rb', buffering=_READ_BUFFER)
+
+
+def first_time(path: str):
+    """Return the time of day of the first record in a log, or None."""
+    with open_log(path) as f:
+        for line in f:
+            match = RECORD.match(line)
+            if match:
+                hh, mm, ss = match.groups()[:3]
+                return int(hh) * 3600 + int(mm) * 60 + int(ss)
+    return None
+
+
+def read_records(path: str, idx=0, day=0, min_rank=0, max_veb=None):
+    """Yield the records of one log as merge keys, in file order.
+
+    Times are seconds since midnight of the first day of the merge; a time
+    more than 12 hours earlier than the one before it is taken as the next
+    day. Lines before the first record are yielded one by one at the start
+    of the file's first day.
+
+    Args:
+        - path (str): (required) the log file.
+        - idx  (int): (optional) the file's place in the merge, used to
+                      order records with the same time and sequence number.
+        - day  (int): (optional) the day the file starts on.
+        - min_rank (int): (optional) lowest SEVERITY rank kept.
+        - max_veb  (int): (optional) highest INFO-L level kept.
+
+    Yields:
+        - tuple: (time, sequence number, idx, record bytes) where the record
+                 includes its end-of-line and any continuation lines
+    """
+    prev = None
+    key = None
+    parts = []
+    with open_log(path) as f:
+        for line in f:
+            match = RECORD.match(line)
+            if match is None:
+                if key is not None:
+                    parts.append(line)
+                elif prev is None:
+                    yield (day * DAY, -1, idx, line)
+                continue
+            if key is not None:
+                yield (*key, b''.join(parts))
+                key = None
+            hh, mm, ss, seq, prefix = match.groups()
+            tod = int(hh) * 3600 + int(mm) * 60 + int(ss)
+            if prev is not None and tod < prev - DAY / 2:
+                day += 1
+            prev = tod
+            # prev is set, so continuation lines of a dropped record are
+            # dropped with it
+            if min_rank > 0 or max_veb is not None:
+                if _BIT_RANK[LEVEL_BITS.get(prefix, 4)] < min_rank:
+                    continue
+                if (max_veb is not None and prefix is not None
+                        and prefix[:6] == b'INFO-L'
+                        and int(prefix[6:-2]) > max_veb):
+                    continue
+            key = (day * DAY + tod, int(seq), idx)
+            parts = [line]
+    if key is not None:
+        yield (*key, b''.join(parts))
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def merge_logs(paths: list, min_level='info', max_veb=None, dedup=False):
+    """Yield the records of several bp log files merged into one timeline.
+
+    Every file is taken to start on the same day, except that a file whose
+    first record is more than 12 hours before the latest first record starts
+    the day after; so a process started just after midnight sorts after the
+    ones started just before it.
+
+    Example:
+        - with open('merged.log', 'wb') as out:
+              for record in merge_logs(['a.log', 'b.log.gz'],
+                                       min_level='warning'):
+                  out.write(record)
+
+    Args:
+        - paths (list): (required) the log files, plain or gzip compressed.
+        - min_level (str): (optional) lowest level kept, from SEVERITY.
+                           Defaults to 'info' (everything).
+        - max_veb   (int): (optional) highest INFO-L level kept.
+        - dedup    (bool): (optional) write a record found in more than one
+                           file once; only for files from one process, such
+                           as a log_file and its error_log_file. Defaults to
+                           False.
+
+    Yields:
+        - bytes: each record, including its end-of-line and any
+                 continuation lines
+    """
+    if min_level not in SEVERITY:
+        raise Exception(
+            f'{Ct.red}"Better Print" (merge_logs) function -> "min_level" '
+            f'must be one of {tuple(SEVERITY)}. min_level = {min_level}{Ct.a}'
+        )
+    starts = [first_time(path) for path in paths]
+    latest = max((start for start in starts if start is not None), default=0)
+    sources = [
+        read_records(path, idx,
+                     int(start is not None and start < latest - DAY / 2),
+                     SEVERITY[min_level], max_veb)
+        for idx, (path, start) in enumerate(zip(paths, starts))]
+    # records that are the same bytes share a time, so only the current
+    # second's records are remembered
+    when = None
+    seen = set()
+    for ts, _, _, record in heapq.merge(*sources):
+        if dedup:
+            if ts != when:
+                when = ts
+                seen.clear()
+            elif record in seen:
+                continue
+            seen.add(record)
+        yield record
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m betterprint.merge',
+        description='merge date_log bp log files into one timeline',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('logs', metavar='<filename>', nargs='+',
+                        help='bp log files written with date_log, plain or '
+                             'gzip compressed')
+    parser.add_argument('-o', '--output', metavar='<filename>',
+                        help='merged log to write, gzip compressed if it '
+                             'ends in .gz; standard output if not given')
+    parser.add_argument('--min-level', default='info', choices=SEVERITY,
+                        help='lowest level to keep: info (INFO-Lx) < none '
+                             '(plain lines) < warning < error')
+    parser.add_argument('--max-veb', type=int, metavar='N',
+                        help='drop INFO-Lx records with x above N')
+    parser.add_argument('--dedup', action='store_true',
+                        help='write records found in more than one file once; '
+                             'only for the logs of one process, such as a '
+                             'log_file and its error_log_file')
+    args = parser.parse_args()
+
+    records = merge_logs(args.logs, args.min_level, args.max_veb, args.dedup)
+    try:
+        if args.output is None:
+            out = sys.stdout.buffer
+        elif args.output.endswith('.gz'):
+            out = gzip.open(args.output, 'wb')
+        else:
+            out = open(args.output, 'wb', buffering=_READ_BUFFER)
+    except OSError as e:
+        bp([f'could not open {args.output}\n\t{e}', Ct.red], err=2, fil=0)
+        sys.exit(1)
+    try:
+        for record in records:
+            out.write(record)
+        out.flush()
+    except BrokenPipeError:
+        # the reader (e.g. head) has gone; stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    except OSError as e:
+        bp([f'could not merge the logs\n\t{e}', Ct.red], err=2, fil=0)
+        sys.exit(1)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
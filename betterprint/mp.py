@@ -0,0 +1,251 @@
+'''mp.py v0.1.0'''
+
+import atexit
+import itertools
+import multiprocessing
+from multiprocessing import util
+from queue import Empty
+import threading
+import time
+import betterprint.betterprint as bpmod
+
+
+# ~~~ #                 -global variable-
+# worker side state: the collector queue and the records not yet sent
+_worker = {
+    'queue': None,
+    'buf': [],
+    'batch_size': 64,
+    'flush_interval': 0.05,
+    'last_send': 0.0,
+    # bp_tracker_all when calls were last reported to the collector
+    'calls': 0,
+    'lock': threading.Lock(),
+    'flusher': None,
+}
+# bp_dict keys that are process-local and never copied to other processes
+_LOCAL_KEYS = ('bp_tracker_all', 'bp_tracker_con', 'bp_tracker_log',
+               'bp_tracker_elog')
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class BpCollector:
+    """One process that does all console and log file output for a group of
+    worker processes, numbering lines with global bp_tracker counters.
+
+    Workers (and the parent, once started) format each bp line as usual but
+    send it over a queue instead of writing it. Records are sent in batches of
+    batch_size, or sooner on err > 0, fls=1, after flush_interval seconds, on
+    bp_mp_flush(), and at worker exit. Each batch also carries the sender's
+    bp calls since the last one, so bp_tracker_all covers every process too.
+
+    Example:
+        - collector = BpCollector()
+          collector.start()
+          with multiprocessing.Pool(initializer=bp_mp_worker_init,
+                                    initargs=collector.initargs) as pool:
+              pool.map(work, items)
+              pool.close()
+              pool.join()
+          collector.stop()
+
+    Workers stopped with Pool.terminate() lose records they have not sent
+    yet; close() and join() the pool first, or call bp_mp_flush() at the end
+    of each task.
+    """
+    __slots__ = (
+        'ctx',
+        'batch_size',
+        'flush_interval',
+        'queue',
+        'process',
+        '_result',
+    )
+
+    def __init__(self, ctx=None, batch_size=64, flush_interval=0.05):
+        self.ctx = ctx or multiprocessing.get_context()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = None
+        self.process = None
+        self._result = None
+
+    @property
+    def initargs(self) -> tuple:
+        """Arguments for bp_mp_worker_init, e.g. as a Pool initargs."""
+        return (self.queue, _settings(), self.batch_size, self.flush_interval)
+
+    def start(self):
+        """Start the collector process and route this process' bp calls to it.
+        """
+        # the collector takes over the log files; write out what is buffered
+        bpmod.bp_flush()
+        self.queue = self.ctx.Queue()
+        self._result, child_conn = self.ctx.Pipe(duplex=False)
+        # the collector numbers on from this process' lines so far
+        totals = bpmod.bp_trackers()
+        seed = {key: totals[key] for key in _LOCAL_KEYS}
+        self.process = self.ctx.Process(
+            target=_collector_main,
+            args=(self.queue, _settings(), child_conn, seed),
+            name='bp-collector', daemon=True)
+        self.process.start()
+        child_conn.close()
+        bp_mp_worker_init(*self.initargs)
+
+    def stop(self) -> dict:
+        """Send everything still buffered, stop the collector, and take its
+        counters as this process' totals.
+
+        Return:
+            - dict: bp_tracker_all, bp_tracker_con, bp_tracker_log, and
+                    bp_tracker_elog totals of all processes, the calls and
+                    lines before start() included
+        """
+        _detach()
+        self.queue.put(None)
+        counters = self._result.recv()
+        self.process.join()
+        # in thread_safe mode part of the totals are per-thread counts, so
+        # bp_dict takes the difference
+        totals = bpmod.bp_trackers()
+        for key in _LOCAL_KEYS:
+            bpmod.bp_dict[key] += counters[key] - totals[key]
+        if bpmod._seqs is not None:
+            bpmod._seqs = (itertools.count(counters['bp_tracker_con'] + 1),
+                           itertools.count(counters['bp_tracker_log'] + 1))
+        return counters
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def bp_mp_worker_init(queue, settings: dict, batch_size=64,
+                      flush_interval=0.05):
+    """Route this process' bp calls to a BpCollector. Use as a Pool
+    initializer with BpCollector.initargs.
+
+    Args:
+        - queue (multiprocessing.Queue): (required) the collector queue.
+        - settings (dict): (required) bp_dict settings from the parent.
+        - batch_size (int): (optional) records held before sending.
+        - flush_interval (float): (optional) seconds held before sending.
+    """
+    bpmod.bp_dict.update(settings)
+    _worker['queue'] = queue
+    _worker['buf'] = []
+    _worker['batch_size'] = batch_size
+    _worker['flush_interval'] = flush_interval
+    _worker['last_send'] = time.monotonic()
+    _worker['calls'] = bpmod.bp_trackers()['bp_tracker_all']
+    _worker['lock'] = threading.Lock()
+    _worker['flusher'] = threading.Thread(
+        target=_flush_loop, args=(queue,), name='bp-mp-flusher', daemon=True)
+    _worker['flusher'].start()
+    bpmod._forward = _send
+    # pool workers exit through multiprocessing, which skips atexit; run
+    # ahead of the queue's own close finalizer (exitpriority=10)
+    util.Finalize(None, bp_mp_flush, exitpriority=100)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def bp_mp_flush():
+    """Send every record this process has buffered to the collector now."""
+    with _worker['lock']:
+        _send_buf()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _send(record: tuple):
+    """bp forward hook: buffer a record and send the batch when due."""
+    with _worker['lock']:
+        buf = _worker['buf']
+        buf.append(record)
+        # record[4] is err and record[6] is fls
+        if (len(buf) >= _worker['batch_size'] or record[4] > 0 or record[6]
+                or time.monotonic() - _worker['last_send']
+                >= _worker['flush_interval']):
+            _send_buf()
+
+
+def _send_buf():
+    # caller must hold _worker['lock']; sends (records, calls since the last
+    # send)
+    _worker['last_send'] = time.monotonic()
+    if _worker['queue'] is None:
+        return
+    calls = bpmod.bp_trackers()['bp_tracker_all']
+    if _worker['buf'] or calls != _worker['calls']:
+        _worker['queue'].put((_worker['buf'], calls - _worker['calls']))
+        _worker['calls'] = calls
+        _worker['buf'] = []
+
+
+def _flush_loop(queue):
+    """Send records left idle past flush_interval while bp is not called."""
+    while _worker['queue'] is queue:
+        time.sleep(_worker['flush_interval'])
+        with _worker['lock']:
+            if (_worker['buf'] and time.monotonic() - _worker['last_send']
+                    >= _worker['flush_interval']):
+                _send_buf()
+
+
+def _detach():
+    """Send what is buffered and go back to writing output directly."""
+    bpmod._forward = None
+    bp_mp_flush()
+    _worker['queue'] = None
+
+
+def _settings() -> dict:
+    """The bp_dict settings to copy into other processes."""
+    return {key: val for key, val in bpmod.bp_dict.items()
+            if key not in _LOCAL_KEYS}
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _collector_main(queue, settings: dict, result_conn, seed: dict):
+    """Collector process: number, format, and write batches from all workers.
+
+    Args:
+        - queue (multiprocessing.Queue): (required) (records, calls) batches
+                                         of bp records and bp call counts.
+        - settings (dict): (required) bp_dict settings from the parent.
+        - result_conn (Connection): (required) receives the final counters.
+        - seed (dict): (required) the parent's bp_tracker counters to number
+                       on from.
+    """
+    bpmod._forward = None
+    bpmod.bp_dict.update(settings)
+    # a forked collector inherits the parent's per-thread counts; start from
+    # the seed alone
+    bpmod.bp_dict.update(seed)
+    bpmod._thread_counts_all.clear()
+    bpmod._seqs = None
+    bpmod.bp_dict['async'] = 0
+    finish = bpmod._finish_record
+    write = bpmod._write_records
+    done = False
+    while not done:
+        batch = queue.get()
+        records = []
+        # drain whatever else is already waiting into the same write
+        while batch is not None:
+            recs, calls = batch
+            bpmod.bp_dict['bp_tracker_all'] += calls
+            records.extend([finish(*rec) for rec in recs])
+            if len(records) >= 4096:
+                break
+            try:
+                batch = queue.get_nowait()
+            except Empty:
+                break
+        done = batch is None
+        if records:
+            write(records)
+    bpmod.bp_shutdown()
+    totals = bpmod.bp_trackers()
+    result_conn.send({key: totals[key] for key in _LOCAL_KEYS})
+    result_conn.close()
+
+
+atexit.register(bp_mp_flush)
@@ -0,0 +1,180 @@
+'''progress.py v0.1.0'''
+
+import shutil
+import sys
+import time
+from betterprint.betterprint import _color_depth, bp
+from betterprint.colortext import Ct, display_width
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class BpProgress:
+    """One or more progress bars drawn in place with a capped frame rate.
+
+    update() and advance() only record state. A frame is drawn at most fps
+    times a second, and only the bars whose text changed since the last frame
+    are rewritten, with the cursor moves for all of them coalesced into a
+    single bp write.
+
+    When bp_dict['color'] == 0, bp_dict['color_depth'] resolves to 'none', or
+    stdout is not a TTY, cursor movement is not used; instead a plain
+    "label: NN% (value/total)" line is printed for each changed bar every
+    plain_interval seconds.
+
+    Example:
+        - bars = BpProgress(3, labels=['download', 'unpack', 'install'])
+          for step in work():
+              bars.advance(step.bar)
+          bars.close()
+
+    Args:
+        - count (int): (optional) number of bars. Defaults to 1.
+        - total (int): (optional) value that means complete. Defaults to 100.
+        - width (int): (optional) bar width in characters. Defaults to 50.
+                       None fits each bar and its label to the terminal.
+        - fps (float): (optional) maximum frames per second. Defaults to 15.
+        - labels (list): (optional) text shown after each bar.
+        - symbol (str): (optional) the complete symbol. Defaults to '━'.
+        - empty (str): (optional) the empty symbol. Defaults to '─'.
+        - symbol_color (str): (optional) 'symbol' color. Defaults to Ct.A.
+        - empty_color (str): (optional) 'empty' color. Defaults to Ct.GREY1.
+        - bracket_color (str): (optional) 'bracket' color. Defaults to Ct.A.
+        - plain_interval (float): (optional) seconds between plain updates.
+    """
+    __slots__ = (
+        'count',
+        'total',
+        'width',
+        'labels',
+        'symbol',
+        'empty',
+        'symbol_color',
+        'empty_color',
+        'bracket_color',
+        'plain_interval',
+        'values',
+        '_frame_time',
+        '_last_frame',
+        '_drawn',
+        '_plain',
+        '_started',
+        '_closed',
+    )
+
+    def __init__(self, count=1, total=100, width=50, fps=15, labels=None,
+                 symbol='━', empty='─', symbol_color=Ct.a,
+                 empty_color=Ct.grey1, bracket_color=Ct.a, plain_interval=2.0):
+        self.count = count
+        self.total = total
+        self.labels = labels or [''] * count
+        if width is None:
+            # a bar line that wraps would throw off the cursor moves, so leave
+            # room for the brackets, a space, and the widest label
+            label_width = max(display_width(label) for label in self.labels)
+            width = max(shutil.get_terminal_size().columns - label_width - 4,
+                        10)
+        self.width = width
+        self.symbol = symbol
+        self.empty = empty
+        self.symbol_color = symbol_color
+        self.empty_color = empty_color
+        self.bracket_color = bracket_color
+        self.plain_interval = plain_interval
+        self.values = [0] * count
+        self._frame_time = 1 / fps
+        self._last_frame = 0.0
+        # last text drawn for each bar; None forces a redraw
+        self._drawn = [None] * count
+        self._plain = _color_depth() == 'none' or not sys.stdout.isatty()
+        self._started = False
+        self._closed = False
+
+    def update(self, idx: int, value):
+        """Set bar idx to value and draw a frame if one is due.
+
+        Args:
+            - idx   (int): (required) bar index.
+            - value (int): (required) progress out of total.
+        """
+        self.values[idx] = min(value, self.total)
+        self.render()
+
+    def advance(self, idx=0, step=1):
+        """Add step to bar idx and draw a frame if one is due.
+
+        Args:
+            - idx  (int): (optional) bar index. Defaults to 0.
+            - step (int): (optional) amount to add. Defaults to 1.
+        """
+        self.values[idx] = min(self.values[idx] + step, self.total)
+        self.render()
+
+    def render(self, force=False):
+        """Draw the changed bars if the frame interval has passed.
+
+        Args:
+            - force (bool): (optional) draw now regardless of the interval.
+        """
+        now = time.monotonic()
+        interval = self.plain_interval if self._plain else self._frame_time
+        if not force and now - self._last_frame < interval:
+            return
+        self._last_frame = now
+        if self._plain:
+            self._render_plain()
+        else:
+            self._render_tty()
+
+    def close(self):
+        """Draw the final state of every bar. Call once when done."""
+        if self._closed:
+            return
+        self.render(force=True)
+        self._closed = True
+
+    def _bar(self, idx: int) -> str:
+        filled = int(self.width * self.values[idx] / self.total)
+        return (
+            f'{self.bracket_color}[{self.symbol_color}{self.symbol * filled}'
+            f'{self.empty_color}{self.empty * (self.width - filled)}'
+            f'{self.bracket_color}]{Ct.a} {self.labels[idx]}'
+        )
+
+    def _render_tty(self):
+        frame = []
+        if not self._started:
+            # reserve the lines once; the cursor then rests below the block
+            self._started = True
+            for idx in range(self.count):
+                self._drawn[idx] = self._bar(idx)
+                frame.append(self._drawn[idx])
+            frame = ['\n'.join(frame)]
+        else:
+            for idx in range(self.count):
+                bar = self._bar(idx)
+                if bar == self._drawn[idx]:
+                    continue
+                self._drawn[idx] = bar
+                up = self.count - idx
+                frame.append(f'\u001b[{up}A\r{bar}\u001b[K\u001b[{up}B\r')
+            if frame:
+                # step up so the end of line below lands back on the rest line
+                frame.append('\u001b[1A')
+        if frame:
+            # a whole line rather than in-line text, which thread_safe mode
+            # would hold until this thread ends a line
+            bp([''.join(frame), ''], fls=1, log=0, num=0, fil=0)
+
+    def _render_plain(self):
+        lines = []
+        for idx, value in enumerate(self.values):
+            if value == self._drawn[idx]:
+                continue
+            self._drawn[idx] = value
+            label = self.labels[idx] or f'bar {idx + 1}'
+            lines.append(
+                f'{label}: {value / self.total * 100:.0f}% '
+                f'({value}/{self.total})'
+            )
+        if lines:
+            bp(['\n'.join(lines), Ct.a], log=0, fil=0)
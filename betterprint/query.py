@@ -0,0 +1,361 @@
+'''query.py v0.1.0
+
+Query bp log files written with date_log, whose lines look like
+    [12:01:02]-1534-ERROR: text
+
+The log is memory-mapped and a sparse index is kept next to it in
+<log>.bpidx: one entry per block of about block_size bytes with the block's
+offset, sequence number range, time range, and the levels it contains. A
+query only reads the blocks that can hold a match. Each run indexes just the
+part of the log written since the last run; the index is rebuilt if the log
+was truncated or replaced.
+
+Run from the command line:
+    python -m betterprint.query app.log --level error --from 12:00 --to 12:05
+    python -m betterprint.query app.log --seq 1.2M-1.3M
+'''
+
+import argparse
+import hashlib
+import mmap
+import os
+import re
+import struct
+import sys
+from betterprint.betterprint import bp
+from betterprint.colortext import Ct
+
+
+# ~~~ #                 -global variable-
+# the start of a record; lines without it continue the previous record
+RECORD = re.compile(
+    rb'^\[(\d\d):(\d\d):(\d\d)\]-(\d+)-(ERROR: |WARNING: |INFO-L\d+: )?',
+    re.M)
+# level name -> bit in a block's level mask
+LEVELS = {'error': 1, 'warning': 2, 'info': 4, 'none': 8}
+LEVEL_BITS = {b'ERROR: ': 1, b'WARNING: ': 2, None: 8}
+DAY = 86400
+_MAGIC = b'BPIDX001'
+# magic, block size, indexed bytes, entry count, signature length, signature
+_HEADER = struct.Struct('<8sQQQQ32s')
+# offset, min seq, max seq, first time, last time, level mask
+_ENTRY = struct.Struct('<QQQddB')
+_SIG_BYTES = 4096
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class BpLogIndex:
+    """A sparse, incrementally updated index over one bp log file.
+
+    Times are kept as seconds since midnight of the log's first day; a time
+    more than 12 hours earlier than the one before it is taken as the next
+    day, so logs that run past midnight keep their order.
+
+    Example:
+        - index = BpLogIndex('app.log')
+          for record in index.query(start=12 * 3600, end=12 * 3600 + 300,
+                                    levels={'error'}):
+              print(record.decode(), end='')
+
+    Args:
+        - path (str): (required) the bp log file.
+        - block_size (int): (optional) bytes per index entry. Defaults to
+                            65536.
+    """
+    __slots__ = (
+        'path',
+        'index_path',
+        'block_size',
+        'indexed',
+        'entries',
+        '_sig_len',
+        '_sig',
+    )
+
+    def __init__(self, path: str, block_size=65536):
+        self.path = path
+        self.index_path = f'{path}.bpidx'
+        self.block_size = block_size
+        self.indexed = 0
+        self.entries = []
+        self._sig_len = 0
+        self._sig = b''
+        self._load()
+
+    def update(self) -> int:
+        """Index whatever was appended to the log since the last update.
+
+        Return:
+            - int: number of bytes indexed
+        """
+        size = os.path.getsize(self.path)
+        if size == 0:
+            self._reset()
+            return 0
+        with open(self.path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if (size < self.indexed or self._sig_len == 0
+                        or _signature(mm, self._sig_len) != self._sig):
+                    self._reset()
+                    self._sig_len = min(size, _SIG_BYTES)
+                    self._sig = _signature(mm, self._sig_len)
+                # only index complete lines; the writer may be mid-line
+                end = mm.rfind(b'\n') + 1
+                if end <= self.indexed:
+                    return 0
+                # rescan the last block, which may have been partial
+                start = 0
+                day = 0
+                prev = 0.0
+                kept = len(self.entries)
+                if self.entries:
+                    last = self.entries.pop()
+                    kept -= 1
+                    start = last[0]
+                    day = int(last[3] // DAY)
+                    prev = last[3] % DAY
+                added = self._scan(mm, start, end, day, prev)
+        self.entries.extend(added)
+        scanned = end - self.indexed
+        self.indexed = end
+        self._save(kept)
+        return scanned
+
+    def query(self, start=None, end=None, first=None, last=None,
+              levels=None):
+        """Yield the records that match every given filter, in file order.
+
+        Args:
+            - start (float): (optional) seconds since midnight, inclusive;
+                             matched on every day the log covers.
+            - end   (float): (optional) seconds since midnight, inclusive.
+            - first   (int): (optional) lowest sequence number.
+            - last    (int): (optional) highest sequence number.
+            - levels  (set): (optional) names from LEVELS.
+
+        Yields:
+            - bytes: each matching record, including its end-of-line and any
+                     continuation lines
+        """
+        mask = 0
+        for name in levels or LEVELS:
+            mask |= LEVELS[name]
+        with open(self.path, 'rb') as f:
+            if self.indexed == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for idx, entry in enumerate(self.entries):
+                    offset, min_seq, max_seq, t_first, t_last, level = entry
+                    if not level & mask:
+                        continue
+                    if first is not None and max_seq < first:
+                        continue
+                    if last is not None and min_seq > last:
+                        continue
+                    if not _time_overlaps(t_first, t_last, start, end):
+                        continue
+                    block_end = (self.entries[idx + 1][0]
+                                 if idx + 1 < len(self.entries)
+                                 else self.indexed)
+                    yield from _match_block(mm, offset, block_end, start,
+                                            end, first, last, mask)
+
+    def _scan(self, mm, start: int, end: int, day: int, prev: float) -> list:
+        """Build index entries for the records between start and end."""
+        added = []
+        block = None
+        for match in RECORD.finditer(mm, start, end):
+            hh, mm_, ss, seq, prefix = match.groups()
+            tod = int(hh) * 3600 + int(mm_) * 60 + int(ss)
+            if tod < prev - DAY / 2:
+                day += 1
+            prev = tod
+            when = day * DAY + tod
+            seq = int(seq)
+            bit = LEVEL_BITS.get(prefix, 4)
+            pos = match.start()
+            if block is None or pos - block[0] >= self.block_size:
+                if block is not None:
+                    added.append(tuple(block))
+                block = [pos, seq, seq, when, when, bit]
+                continue
+            if seq < block[1]:
+                block[1] = seq
+            elif seq > block[2]:
+                block[2] = seq
+            block[4] = when
+            block[5] |= bit
+        if block is not None:
+            added.append(tuple(block))
+        return added
+
+    def _reset(self):
+        self.indexed = 0
+        self.entries = []
+        self._sig_len = 0
+        self._sig = b''
+
+    def _load(self):
+        """Read the index file, if there is a usable one."""
+        try:
+            with open(self.index_path, 'rb') as f:
+                head = f.read(_HEADER.size)
+                if len(head) < _HEADER.size:
+                    return
+                magic, block_size, indexed, count, sig_len, sig = (
+                    _HEADER.unpack(head))
+                if magic != _MAGIC or block_size != self.block_size:
+                    return
+                data = f.read(count * _ENTRY.size)
+        except OSError:
+            return
+        if len(data) < count * _ENTRY.size:
+            return
+        self.entries = list(_ENTRY.iter_unpack(data))
+        self.indexed = indexed
+        self._sig_len = sig_len
+        self._sig = sig
+
+    def _save(self, kept: int):
+        """Write the entries after the first kept ones, then the header.
+
+        The header goes last, so an interrupted update leaves the old header
+        describing entries that are still valid.
+        """
+        mode = 'r+b' if os.path.exists(self.index_path) and kept else 'wb'
+        with open(self.index_path, mode) as f:
+            f.seek(_HEADER.size + kept * _ENTRY.size)
+            f.write(b''.join(_ENTRY.pack(*entry)
+                             for entry in self.entries[kept:]))
+            f.truncate()
+            f.seek(0)
+            f.write(_HEADER.pack(_MAGIC, self.block_size, self.indexed,
+                                 len(self.entries), self._sig_len, self._sig))
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _signature(mm, length: int) -> bytes:
+    """Hash the first length bytes, to notice a log replaced under us."""
+    return hashlib.sha256(mm[:length]).digest()
+
+
+def _time_overlaps(t_first: float, t_last: float, start, end) -> bool:
+    """Check whether [t_first, t_last] meets the start-end time of day on
+    any day it covers."""
+    if start is None and end is None:
+        return True
+    start = 0 if start is None else start
+    end = DAY - 1 if end is None else end
+    for day in range(int(t_first // DAY), int(t_last // DAY) + 1):
+        if (day * DAY + start <= t_last
+                and day * DAY + end >= t_first):
+            return True
+    return False
+
+
+def _match_block(mm, offset, block_end, start, end, first, last, mask):
+    """Yield the records in one block that pass the filters."""
+    matches = list(RECORD.finditer(mm, offset, block_end))
+    for idx, match in enumerate(matches):
+        hh, mm_, ss, seq, prefix = match.groups()
+        if not LEVEL_BITS.get(prefix, 4) & mask:
+            continue
+        seq = int(seq)
+        if (first is not None and seq < first) or (
+                last is not None and seq > last):
+            continue
+        if start is not None or end is not None:
+            tod = int(hh) * 3600 + int(mm_) * 60 + int(ss)
+            if (start is not None and tod < start) or (
+                    end is not None and tod > end):
+                continue
+        stop = matches[idx + 1].start() if idx + 1 < len(matches) else (
+            block_end)
+        yield mm[match.start():stop]
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def parse_time(val: str, end=False) -> int:
+    """Parse HH:MM or HH:MM:SS into seconds since midnight. Without seconds
+    an end time covers its whole minute.
+
+    Args:
+        - val (str): (required) the time.
+        - end (bool): (optional) True for the end of a range.
+
+    Return:
+        - int: seconds since midnight
+    """
+    parts = [int(part) for part in val.split(':')]
+    if len(parts) == 2:
+        return parts[0] * 3600 + parts[1] * 60 + (59 if end else 0)
+    return parts[0] * 3600 + parts[1] * 60 + parts[2]
+
+
+def parse_count(val: str) -> int:
+    """Parse a sequence number with an optional k or M suffix: 1.2M."""
+    scale = {'k': 1000, 'K': 1000, 'm': 1000000, 'M': 1000000}.get(val[-1:])
+    return round(float(val[:-1]) * scale) if scale else int(val)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m betterprint.query',
+        description='query a date_log bp log file through a sparse index',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('log', metavar='<filename>',
+                        help='bp log file written with date_log')
+    parser.add_argument('--from', dest='start', metavar='HH:MM[:SS]',
+                        help='first time of day to include')
+    parser.add_argument('--to', dest='end', metavar='HH:MM[:SS]',
+                        help='last time of day to include')
+    parser.add_argument('--seq', metavar='FIRST-LAST',
+                        help='sequence number range, e.g. 1.2M-1.3M')
+    parser.add_argument('--level', default='',
+                        help='comma separated levels to include: '
+                             f'{", ".join(LEVELS)}')
+    parser.add_argument('--count', action='store_true',
+                        help='print the number of matching records only')
+    parser.add_argument('--block-size', type=int, default=65536,
+                        help='bytes per index entry')
+    args = parser.parse_args()
+
+    levels = {name.strip().lower() for name in args.level.split(',')
+              if name.strip()}
+    unknown = levels - set(LEVELS)
+    if unknown:
+        bp([f'unknown level(s): {", ".join(sorted(unknown))}', Ct.red], err=2,
+           fil=0)
+        sys.exit(2)
+    first = last = None
+    if args.seq:
+        lo, _, hi = args.seq.partition('-')
+        first = parse_count(lo) if lo else None
+        last = parse_count(hi) if hi else None
+
+    try:
+        index = BpLogIndex(args.log, args.block_size)
+        index.update()
+    except OSError as e:
+        bp([f'could not index {args.log}\n\t{e}', Ct.red], err=2, fil=0)
+        sys.exit(1)
+    records = index.query(
+        parse_time(args.start) if args.start else None,
+        parse_time(args.end, end=True) if args.end else None,
+        first, last, levels or None)
+    if args.count:
+        print(sum(1 for _ in records))
+        return
+    out = sys.stdout.buffer
+    try:
+        for record in records:
+            out.write(record)
+        out.flush()
+    except BrokenPipeError:
+        # the reader (e.g. head) has gone; stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+
+if __name__ == '__main__':
+    main()
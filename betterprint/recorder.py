@@ -0,0 +1,67 @@
+'''recorder.py v0.1.0'''
+
+from datetime import datetime
+from itertools import count
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class FlightRecorder:
+    """The last size bp lines, kept in memory in a preallocated ring buffer.
+
+    Slots are claimed from an itertools.count, so record() takes no lock and
+    never grows the buffer; the oldest line is simply overwritten.
+
+    Args:
+        - size (int): (required) number of lines kept.
+    """
+    __slots__ = (
+        'size',
+        '_slots',
+        '_seq',
+        '_start',
+    )
+
+    def __init__(self, size: int):
+        self.size = size
+        self._slots = [None] * size
+        self._seq = count()
+        # lines numbered below _start were dumped or cleared
+        self._start = 0
+
+    def record(self, ts: float, txt: str):
+        """Keep one line, overwriting the oldest once the buffer is full.
+
+        Args:
+            - ts  (float): (required) time.time() of the bp call.
+            - txt   (str): (required) the plain text of the line.
+        """
+        seq = next(self._seq)
+        self._slots[seq % self.size] = (seq, ts, txt)
+
+    def lines(self) -> list:
+        """Return the kept (ts, txt) lines, oldest first."""
+        kept = [slot for slot in self._slots
+                if slot is not None and slot[0] >= self._start]
+        kept.sort()
+        return [(ts, txt) for _, ts, txt in kept]
+
+    def clear(self):
+        """Forget every kept line."""
+        self._start = next(self._seq) + 1
+
+    def take(self) -> str:
+        """Return the kept lines as dump text and clear them.
+
+        Return:
+            - str: the dump, or '' if no lines are kept
+        """
+        lines = self.lines()
+        self.clear()
+        if not lines:
+            return ''
+        out = [f'----- flight recorder: last {len(lines)} lines -----\n']
+        for ts, txt in lines:
+            stamp = datetime.fromtimestamp(ts).strftime('%H:%M:%S.%f')
+            out.append(f'[{stamp}] {txt}\n')
+        out.append('----- end of flight recorder -----\n')
+        return ''.join(out)
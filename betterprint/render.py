@@ -0,0 +1,140 @@
+'''render.py v0.1.0'''
+
+import codecs
+import re
+from betterprint.colortext import _ANSI, Ct
+
+
+# ~~~ #                 -global variable-
+# split on contiguous runs of digits, keeping the runs at the odd indexes
+_NUM_RUN = re.compile(r'(\d+)')
+# split around escape sequences, and any ESC that does not start a complete
+# one, keeping them at the odd indexes
+_ESCAPES = re.compile(f'({_ANSI.pattern}|\x1b)')
+# an escape sequence cut off by the end of a chunk
+_ESC_TAIL = re.compile(r'\x1b(?:\[[0-?]*[ -/]*|\][^\x07\x1b]*)?\Z')
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def color_numbers(txt: str, color: str, num_color=Ct.bblue) -> str:
+    """Wrap every run of digits in txt with num_color, resuming color after.
+
+    The text is split once and each contiguous run is wrapped once, so "12345"
+    gets a single escape pair instead of one per digit. The pieces are placed
+    with slice assignment and joined once rather than grown per character.
+    Digits inside escape sequences (such as a cursor move) are left alone.
+
+    Args:
+        - txt   (str): (required) text to highlight.
+        - color (str): (required) the Ct color the text is printed in.
+        - num_color (str): (optional) the number color. Defaults to Ct.bblue.
+
+    Return:
+        - str: txt with its digit runs colorized
+    """
+    if '\x1b' not in txt:
+        return _color_runs(txt, color, num_color)
+    parts = _ESCAPES.split(txt)
+    parts[0::2] = [_color_runs(part, color, num_color)
+                   for part in parts[0::2]]
+    return ''.join(parts)
+
+
+def _color_runs(txt: str, color: str, num_color: str) -> str:
+    """color_numbers for text without escape sequences."""
+    parts = _NUM_RUN.split(txt)
+    runs = len(parts) // 2
+    if runs == 0:
+        return txt
+    out = [color] * (4 * runs + 1)
+    out[0::4] = parts[0::2]
+    out[1::4] = [num_color] * runs
+    out[2::4] = parts[1::2]
+    return ''.join(out)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def iter_text(src, chunk_size=65536):
+    """Yield the text of a streamed bp segment in chunks.
+
+    Args:
+        - src: (required) a file-like object with read(), or an iterable
+               (such as a generator) of str or bytes chunks. Bytes are
+               decoded as UTF-8, including characters split across chunks.
+        - chunk_size (int): (optional) characters read per read() call.
+
+    Yields:
+        - str: the next chunk of text
+    """
+    chunks = iter(lambda: src.read(chunk_size), '') if hasattr(
+        src, 'read') else src
+    decoder = None
+    for chunk in chunks:
+        if not chunk:
+            # a binary file signals the end with b''
+            if isinstance(chunk, bytes):
+                break
+            continue
+        if isinstance(chunk, bytes):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder('utf-8')('replace')
+            chunk = decoder.decode(chunk)
+            if not chunk:
+                continue
+        yield chunk
+    if decoder is not None:
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def color_chunks(chunks, color: str, num_color=Ct.bblue, carry_max=4096):
+    """color_numbers for text that arrives in chunks.
+
+    A run of digits, or an escape sequence cut off, at the end of a chunk is
+    held back and joined to the start of the next, so the output is the same
+    as coloring the whole text at once (up to carry_max held characters).
+
+    Args:
+        - chunks: (required) iterable of str.
+        - color (str): (required) the Ct color the text is printed in.
+        - num_color (str): (optional) the number color. Defaults to Ct.bblue.
+        - carry_max (int): (optional) most characters held back.
+
+    Yields:
+        - tuple: (colored chunk, plain chunk); the last colored chunk may
+                 cover held back digits with an empty plain chunk
+    """
+    carry = ''
+    for chunk in chunks:
+        text = f'{carry}{chunk}' if carry else chunk
+        end = escape_tail(text, carry_max)
+        while end > 0 and text[end - 1].isdecimal():
+            end -= 1
+        if end == 0 and len(text) < carry_max:
+            carry = text
+            yield ('', chunk)
+            continue
+        if len(text) - end >= carry_max:
+            end = len(text)
+        carry = text[end:]
+        yield (color_numbers(text[:end], color, num_color), chunk)
+    if carry:
+        yield (color_numbers(carry, color, num_color), '')
+
+
+def escape_tail(text: str, limit=4096) -> int:
+    """Return where an escape sequence cut off by the end of text starts.
+
+    Args:
+        - text  (str): (required) a chunk of streamed text.
+        - limit (int): (optional) longest tail looked for.
+
+    Return:
+        - int: the start of the cut off escape, or len(text) if there is none
+    """
+    esc = text.rfind('\x1b', max(len(text) - limit, 0))
+    if esc >= 0 and _ESC_TAIL.match(text, esc):
+        return esc
+    return len(text)
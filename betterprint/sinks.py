@@ -0,0 +1,362 @@
+'''sinks.py v0.1.0'''
+
+import atexit
+from datetime import datetime
+import glob
+import gzip
+import os
+import queue
+import shutil
+import threading
+import time
+
+
+# ~~~ #                 -global variable-
+# open file sinks keyed by path, and the path each bp_dict key points at
+_open_sinks = {}
+_key_sinks = {}
+_registry_lock = threading.Lock()
+_flusher = None
+# rotated files waiting for compression and pruning, and the thread doing it
+_rotated = queue.Queue()
+_compressor = None
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class FileSink:
+    """A log file that is opened once and held open for appending.
+
+    Lines are collected in memory and written with a single write call once
+    the buffer passes buffer_size characters, once flush_interval seconds have
+    passed since the last flush, or when flush() is called directly.
+
+    The file is rotated before a write would take it past max_bytes
+    (approximate, counted in characters), or when a rotate_interval boundary
+    of wall-clock time is crossed. A rotated file is renamed to
+    <path>.<YYYYmmdd-HHMMSS-ffffff>, then gzip-compressed (if compress) and
+    pruned to the newest backup_count generations on a background thread.
+    """
+    __slots__ = (
+        'path',
+        'buffer_size',
+        'flush_interval',
+        'max_bytes',
+        'rotate_interval',
+        'backup_count',
+        'compress',
+        'binary',
+        'flushes',
+        'rotations',
+        '_f',
+        '_buf',
+        '_buf_len',
+        '_last_flush',
+        '_lock',
+        '_size',
+        '_rotate_at',
+        '_settings',
+    )
+
+    def __init__(self, path: str, buffer_size=65536, flush_interval=1.0,
+                 max_bytes=0, rotate_interval=0, backup_count=5, compress=1,
+                 binary=0):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self.binary = binary
+        self._settings = (buffer_size, flush_interval, max_bytes,
+                          rotate_interval, backup_count, compress)
+        self.flushes = 0
+        self.rotations = 0
+        self._buf = []
+        self._buf_len = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._open()
+
+    def write(self, txt: str, flush=0):
+        """Buffer txt and write it out if any flush threshold is reached.
+
+        Args:
+            - txt   (str): (required) text to append, including end-of-line;
+                           bytes for a binary sink.
+            - flush (int): (optional) 0 = off (default), 1 = on: write the
+                           buffer to disk now regardless of thresholds.
+        """
+        with self._lock:
+            self._buf.append(txt)
+            self._buf_len += len(txt)
+            if (flush or self._buf_len >= self.buffer_size
+                    or time.monotonic() - self._last_flush
+                    >= self.flush_interval):
+                self._flush()
+
+    def configure(self, buffer_size=65536, flush_interval=1.0, max_bytes=0,
+                  rotate_interval=0, backup_count=5, compress=1):
+        """Apply new buffering and rotation settings to the open file.
+
+        Args: as in FileSink.
+        """
+        with self._lock:
+            if rotate_interval != self.rotate_interval:
+                self._rotate_at = None
+                if rotate_interval > 0:
+                    now = time.time()
+                    self._rotate_at = (now - now % rotate_interval
+                                       + rotate_interval)
+            self.buffer_size = buffer_size
+            self.flush_interval = flush_interval
+            self.max_bytes = max_bytes
+            self.rotate_interval = rotate_interval
+            self.backup_count = backup_count
+            self.compress = compress
+            self._settings = (buffer_size, flush_interval, max_bytes,
+                              rotate_interval, backup_count, compress)
+
+    def flush(self):
+        """Write any buffered text to disk."""
+        with self._lock:
+            self._flush()
+
+    def flush_if_stale(self):
+        """Flush only if the buffer has been held past flush_interval."""
+        with self._lock:
+            if (self._buf and time.monotonic() - self._last_flush
+                    >= self.flush_interval):
+                self._flush()
+
+    def close(self):
+        """Flush and close the underlying file."""
+        with self._lock:
+            if self._f.closed:
+                return
+            try:
+                self._flush()
+            finally:
+                self._f.close()
+
+    def _open(self):
+        self._f = open(self.path, 'ab' if self.binary else 'a')
+        self._size = os.path.getsize(self.path)
+        self._rotate_at = None
+        if self.rotate_interval > 0:
+            # align to wall-clock boundaries, e.g. on the hour for 3600
+            now = time.time()
+            self._rotate_at = (now - now % self.rotate_interval
+                               + self.rotate_interval)
+
+    def _flush(self):
+        # caller must hold self._lock
+        self._last_flush = time.monotonic()
+        if not self._buf:
+            return
+        out = (b'' if self.binary else '').join(self._buf)
+        self._buf.clear()
+        self._buf_len = 0
+        if self._rotate_at is not None and time.time() >= self._rotate_at:
+            self._rotate()
+        elif 0 < self.max_bytes < self._size + len(out) and self._size > 0:
+            self._rotate()
+        self._f.write(out)
+        self._f.flush()
+        self._size += len(out)
+        self.flushes += 1
+
+    def _rotate(self):
+        # caller must hold self._lock; rename now, compress in the background
+        if self._size == 0:
+            self._f.close()
+            self._open()
+            return
+        self._f.close()
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        rotated = f'{self.path}.{stamp}'
+        os.replace(self.path, rotated)
+        self.rotations += 1
+        self._open()
+        _rotated.put((rotated, self.path, self.compress, self.backup_count))
+        _start_compressor()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def get_sink(key: str, path: str, buffer_size=65536, flush_interval=1.0,
+             max_bytes=0, rotate_interval=0, backup_count=5, compress=1,
+             binary=0):
+    """Return the open FileSink for a bp_dict key, reopening it if the path
+    assigned to that key has changed since the last call and applying the
+    settings if they have.
+
+    Keys pointing at the same path share one FileSink so that lines are never
+    interleaved between two handles on the same file.
+
+    Args:
+        - key            (str): (required) bp_dict key, e.g. 'log_file'.
+        - path           (str): (required) current file name for that key.
+        - buffer_size    (int): (optional) characters held before writing.
+        - flush_interval (float): (optional) seconds held before writing.
+        - max_bytes      (int): (optional) rotate past this size; 0 = off.
+        - rotate_interval (int): (optional) rotate every this many seconds
+                                 of wall-clock time; 0 = off.
+        - backup_count   (int): (optional) rotated generations to keep.
+        - compress       (int): (optional) 1 = gzip rotated generations.
+        - binary         (int): (optional) 1 = open the file for bytes.
+
+    Return:
+        - FileSink: the sink to write to
+    """
+    settings = (buffer_size, flush_interval, max_bytes, rotate_interval,
+                backup_count, compress)
+    sink = _key_sinks.get(key)
+    if sink is not None and sink.path == path:
+        if sink._settings != settings:
+            sink.configure(*settings)
+        return sink
+    with _registry_lock:
+        sink = _key_sinks.get(key)
+        if sink is not None and sink.path == path:
+            if sink._settings != settings:
+                sink.configure(*settings)
+            return sink
+        _key_sinks.pop(key, None)
+        if sink is not None and sink not in _key_sinks.values():
+            _open_sinks.pop(sink.path, None)
+            sink.close()
+        sink = _open_sinks.get(path)
+        if sink is None:
+            sink = FileSink(path, buffer_size, flush_interval, max_bytes,
+                            rotate_interval, backup_count, compress, binary)
+            _open_sinks[path] = sink
+        elif sink._settings != settings:
+            sink.configure(*settings)
+        _key_sinks[key] = sink
+        _start_flusher()
+    return sink
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def release_sink(key: str):
+    """Stop writing a bp_dict key to its file, closing the file if no other key
+    still uses it.
+
+    Args:
+        - key (str): (required) bp_dict key, e.g. 'log_file'.
+    """
+    with _registry_lock:
+        sink = _key_sinks.pop(key, None)
+        if sink is not None and sink not in _key_sinks.values():
+            _open_sinks.pop(sink.path, None)
+            sink.close()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def sink_counters() -> dict:
+    """Return the disk flush and rotation counts of each open key's file.
+
+    Return:
+        - dict: key -> {'path', 'flushes', 'rotations'}
+    """
+    return {key: {'path': sink.path, 'flushes': sink.flushes,
+                  'rotations': sink.rotations}
+            for key, sink in list(_key_sinks.items())}
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def flush_sinks():
+    """Write all buffered log text to disk."""
+    for sink in list(_open_sinks.values()):
+        sink.flush()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def close_sinks():
+    """Flush and close every open log file, then wait for rotated files to
+    finish compressing. Registered to run at exit."""
+    with _registry_lock:
+        for sink in list(_open_sinks.values()):
+            try:
+                sink.close()
+            except OSError:
+                pass
+        _open_sinks.clear()
+        _key_sinks.clear()
+    if _compressor is not None:
+        _rotated.join()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _flush_loop():
+    """Background loop that flushes sinks left idle past their interval."""
+    while True:
+        sinks = list(_open_sinks.values())
+        interval = min((s.flush_interval for s in sinks), default=1.0)
+        time.sleep(max(interval, 0.05))
+        for sink in sinks:
+            try:
+                sink.flush_if_stale()
+            except (OSError, ValueError):
+                pass
+
+
+def _start_flusher():
+    # caller must hold _registry_lock
+    global _flusher
+    if _flusher is None:
+        _flusher = threading.Thread(
+            target=_flush_loop, name='bp-sink-flusher', daemon=True)
+        _flusher.start()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _compress_loop():
+    """Background loop that gzips rotated files and prunes old generations."""
+    while True:
+        rotated, path, compress, backup_count = _rotated.get()
+        try:
+            if compress:
+                with open(rotated, 'rb') as f_in:
+                    with gzip.open(f'{rotated}.gz', 'wb') as f_out:
+                        shutil.copyfileobj(f_in, f_out, 1 << 20)
+                os.remove(rotated)
+            # the timestamp suffix sorts oldest first
+            generations = sorted(glob.glob(f'{glob.escape(path)}.????????-*'))
+            for old in generations[:max(len(generations) - backup_count, 0)]:
+                os.remove(old)
+        except OSError:
+            pass
+        finally:
+            _rotated.task_done()
+
+
+def _start_compressor():
+    global _compressor
+    if _compressor is None:
+        _compressor = threading.Thread(
+            target=_compress_loop, name='bp-log-compressor', daemon=True)
+        _compressor.start()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def _reset_after_fork():
+    """Forget the parent's sinks in a forked child.
+
+    The parent still owns and flushes its buffered lines, so the child drops
+    its copies instead of writing them a second time at exit.
+    """
+    global _flusher, _registry_lock, _rotated, _compressor
+    for sink in _open_sinks.values():
+        sink._buf.clear()
+        sink._buf_len = 0
+    _open_sinks.clear()
+    _key_sinks.clear()
+    _registry_lock = threading.Lock()
+    _flusher = None
+    _rotated = queue.Queue()
+    _compressor = None
+
+
+atexit.register(close_sinks)
+os.register_at_fork(after_in_child=_reset_after_fork)
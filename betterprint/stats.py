@@ -0,0 +1,76 @@
+'''stats.py v0.1.0'''
+
+import copy
+
+
+# ~~~ #                 -global variable-
+# sinks bp writes to, in the order they are reported
+SINKS = ('console', 'log_file', 'error_log_file', 'struct_log_file')
+# latency histograms use power of two buckets: bucket n counts times of
+# 2**(n-1) to 2**n - 1 nanoseconds
+HIST_BUCKETS = 64
+# live counters, updated in place by bp while bp_dict['stats'] == 1
+stats = {}
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def reset():
+    """Zero every counter and histogram."""
+    stats.clear()
+    stats.update({
+        'formatted': 0,             # bp calls that were formatted
+        'filtered': {},             # veb -> calls skipped by verbosity
+        'sampled': 0,               # calls skipped by sample_every
+        'suppressed': 0,            # err lines dropped by storm_key
+        'format_ns': 0,             # total time spent formatting
+        'write_ns': 0,              # total time spent in sink writes
+        'writes': 0,                # sink write passes (a batch is one)
+        'format_hist': [0] * HIST_BUCKETS,
+        'write_hist': [0] * HIST_BUCKETS,
+        'sinks': {sink: {'lines': 0, 'bytes': 0, 'flushes': 0}
+                  for sink in SINKS},
+    })
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def percentile(hist: list, pct: float) -> int:
+    """Estimate a percentile from a power of two histogram.
+
+    Args:
+        - hist (list): (required) a latency histogram.
+        - pct (float): (required) 0-100.
+
+    Return:
+        - int: upper bound in ns of the bucket holding the percentile, or 0
+               if the histogram is empty
+    """
+    total = sum(hist)
+    if total == 0:
+        return 0
+    target = total * pct / 100
+    running = 0
+    for bucket, hits in enumerate(hist):
+        running += hits
+        if running >= target:
+            return (1 << bucket) - 1
+    return (1 << (len(hist) - 1)) - 1
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def snapshot() -> dict:
+    """Return a copy of the counters with averages and percentiles added.
+
+    Return:
+        - dict: the stats snapshot
+    """
+    snap = copy.deepcopy(stats)
+    for kind in ('format', 'write'):
+        hist = snap[f'{kind}_hist']
+        count = sum(hist)
+        snap[f'{kind}_avg_ns'] = snap[f'{kind}_ns'] // count if count else 0
+        for pct in (50, 90, 99):
+            snap[f'{kind}_p{pct}_ns'] = percentile(hist, pct)
+    return snap
+
+
+reset()
@@ -0,0 +1,153 @@
+'''storm.py v0.1.0'''
+
+import re
+import sys
+import threading
+import time
+
+
+# ~~~ #                 -global variable-
+# digit runs are collapsed so "retry 12 of 50" and "retry 13 of 50" match
+_DIGITS = re.compile(r'\d+')
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def call_site() -> tuple:
+    """Return (filename, line number) of the first caller outside betterprint.
+
+    Return:
+        - tuple: the call site key
+    """
+    frame = sys._getframe(1)
+    while frame.f_back is not None:
+        name = frame.f_globals.get('__name__', '')
+        if name != 'betterprint' and not name.startswith('betterprint.'):
+            break
+        frame = frame.f_back
+    return (frame.f_code.co_filename, frame.f_lineno)
+
+
+def text_key(text: str) -> str:
+    """Return text with every run of digits replaced by '#'."""
+    return _DIGITS.sub('#', text)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class StormGuard:
+    """Per key rate limiting with "repeated N times" summaries, and per call
+    site sampling.
+
+    Each key may write limit lines per window. Further lines in that window
+    are suppressed and counted; once the window has passed, the next check
+    (for any key) or expire() returns a summary of what was suppressed. Keys
+    are dropped once their window is over, so the table only holds recent
+    keys.
+    """
+    __slots__ = (
+        '_keys',
+        '_sites',
+        '_lock',
+        '_next_sweep',
+    )
+
+    def __init__(self):
+        # key -> [window start, lines seen, lines suppressed, err, last text]
+        self._keys = {}
+        # call site -> calls seen, for sampling
+        self._sites = {}
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def check(self, key, text: str, err: int, limit: int,
+              window: float) -> tuple:
+        """Count a line against its key.
+
+        Args:
+            - key: (required) the call site or normalized text.
+            - text (str): (required) the line, kept for the summary.
+            - err  (int): (required) the line's bp err.
+            - limit (int): (required) lines written per key per window.
+            - window (float): (required) seconds per window.
+
+        Return:
+            - tuple: (write, due) where write is False if the line is
+                     suppressed and due is a list of (err, count, text)
+                     summaries for windows that have ended
+        """
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            if now >= self._next_sweep:
+                self._next_sweep = now + window
+                for old_key, state in list(self._keys.items()):
+                    if now - state[0] >= window:
+                        del self._keys[old_key]
+                        if state[2]:
+                            due.append((state[3], state[2], state[4]))
+            state = self._keys.get(key)
+            if state is None or now - state[0] >= window:
+                if state is not None and state[2]:
+                    due.append((state[3], state[2], state[4]))
+                self._keys[key] = [now, 1, 0, err, text]
+                return (True, due)
+            state[1] += 1
+            if state[1] <= limit:
+                return (True, due)
+            state[2] += 1
+            state[3] = max(state[3], err)
+            state[4] = text
+            return (False, due)
+
+    def expire(self, window: float) -> tuple:
+        """Take the summaries of the windows that have ended.
+
+        Args:
+            - window (float): (required) seconds per window.
+
+        Return:
+            - tuple: (due, wait) where due is a list of (err, count, text)
+                     summaries and wait is the seconds until the next window
+                     with suppressed lines ends, or None if there is none
+        """
+        now = time.monotonic()
+        due = []
+        wait = None
+        with self._lock:
+            for key, state in list(self._keys.items()):
+                left = state[0] + window - now
+                if left <= 0:
+                    del self._keys[key]
+                    if state[2]:
+                        due.append((state[3], state[2], state[4]))
+                elif state[2] and (wait is None or left < wait):
+                    wait = left
+        return (due, wait)
+
+    def drain(self) -> list:
+        """Return the summaries of every key with suppressed lines and forget
+        all keys.
+
+        Return:
+            - list: (err, count, text) summaries
+        """
+        with self._lock:
+            due = [(state[3], state[2], state[4])
+                   for state in self._keys.values() if state[2]]
+            self._keys.clear()
+            self._sites.clear()
+        return due
+
+    def sample(self, site, every: int) -> bool:
+        """Return True for the first and then every nth call from a site.
+
+        Args:
+            - site: (required) the call site key.
+            - every (int): (required) keep 1 call in every.
+
+        Return:
+            - bool: True if this call should be written
+        """
+        with self._lock:
+            seen = self._sites.get(site, 0)
+            self._sites[site] = seen + 1
+        return seen % every == 0
@@ -0,0 +1,119 @@
+'''structured.py v0.1.0
+
+Structured bp records written next to the human text log.
+
+Each record holds the call timestamp, a sequence number, err, veb, and the
+raw text segments with the name of the Ct color each was printed in. The
+sequence number is the bp_tracker_log number of the same line in log_file
+(the N of [HH:MM:SS]-N- with date_log), or 0 when log_file is off, so the two
+logs can be joined on it.
+
+JSON Lines ('jsonl'), one object per line:
+    {"ts":1734000000.123456,"seq":1,"err":0,"veb":0,
+     "seg":[["Hello ","red"],["world","a"]]}
+
+Compact binary ('bin'), little-endian, one length-prefixed record after
+another:
+    uint32 record length (excluding these 4 bytes)
+    float64 ts, uint64 seq, int8 err, int8 veb, uint16 segment count
+    per segment: uint32 text length, utf-8 text, uint8 color name length,
+                 ascii color name
+'''
+
+from json.encoder import encode_basestring
+import struct
+from betterprint.colortext import Ct
+
+
+# ~~~ #                 -global variable-
+# Ct escape code -> color name, built once
+COLOR_NAMES = {getattr(Ct, name): name for name in Ct.__slots__
+               if hasattr(Ct, name)}
+_HEAD = struct.Struct('<IdQbbH')
+_SEG_LEN = struct.Struct('<I')
+_name_bytes = {}
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def encode_jsonl(ts: float, seq: int, err: int, veb: int, txt: list) -> str:
+    """Encode one bp call as a JSON Lines record, built directly as a string.
+
+    Args:
+        - ts   (float): (required) time.time() of the bp call.
+        - seq    (int): (required) the line's log_file number, or 0.
+        - err    (int): (required) bp err.
+        - veb    (int): (required) bp veb.
+        - txt   (list): (required) the bp txt list of text/color pairs.
+
+    Return:
+        - str: the record including its end-of-line
+    """
+    names = COLOR_NAMES
+    seg = ','.join([
+        f'[{encode_basestring(txt[idx])},'
+        f'{encode_basestring(names.get(txt[idx + 1], txt[idx + 1]))}]'
+        for idx in range(0, len(txt), 2)
+    ])
+    return (f'{{"ts":{ts:.6f},"seq":{seq},"err":{err},"veb":{veb},'
+            f'"seg":[{seg}]}}\n')
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def encode_binary(ts: float, seq: int, err: int, veb: int,
+                  txt: list) -> bytes:
+    """Encode one bp call as a length-prefixed binary record.
+
+    Args:
+        - ts   (float): (required) time.time() of the bp call.
+        - seq    (int): (required) the line's log_file number, or 0.
+        - err    (int): (required) bp err.
+        - veb    (int): (required) bp veb.
+        - txt   (list): (required) the bp txt list of text/color pairs.
+
+    Return:
+        - bytes: the record including its length prefix
+    """
+    parts = [b'']
+    size = _HEAD.size - 4
+    for idx in range(0, len(txt), 2):
+        data = txt[idx].encode()
+        name = _name_bytes.get(txt[idx + 1])
+        if name is None:
+            label = COLOR_NAMES.get(txt[idx + 1], txt[idx + 1])[:255]
+            name = bytes((len(label),)) + label.encode('ascii', 'replace')
+            _name_bytes[txt[idx + 1]] = name
+        parts.append(_SEG_LEN.pack(len(data)))
+        parts.append(data)
+        parts.append(name)
+        size += 4 + len(data) + len(name)
+    parts[0] = _HEAD.pack(size, ts, seq, err, veb, len(txt) // 2)
+    return b''.join(parts)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def iter_binary_log(path: str):
+    """Read records back from a 'bin' structured log.
+
+    Args:
+        - path (str): (required) the binary structured log file.
+
+    Yields:
+        - tuple: (ts, seq, err, veb, [(text, color_name), ...])
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    pos = 0
+    while pos + _HEAD.size <= len(data):
+        size, ts, seq, err, veb, nseg = _HEAD.unpack_from(data, pos)
+        pos += _HEAD.size
+        segs = []
+        for _ in range(nseg):
+            (tlen,) = _SEG_LEN.unpack_from(data, pos)
+            pos += 4
+            text = data[pos:pos + tlen].decode()
+            pos += tlen
+            nlen = data[pos]
+            name = data[pos + 1:pos + 1 + nlen].decode('ascii')
+            pos += 1 + nlen
+            segs.append((text, name))
+        yield (ts, seq, err, veb, segs)
@@ -0,0 +1,233 @@
+'''template.py v0.1.0'''
+
+from string import Formatter
+import time
+import betterprint.betterprint as bpmod
+from betterprint.colortext import Ct, strip_ansi
+from betterprint.render import color_numbers
+
+
+# ~~~ #                 -global variable-
+_formatter = Formatter()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class BpTemplate:
+    """A bp txt layout validated and pre-rendered once by bp_compile().
+
+    The static text of every segment is colorized (numbers included) at
+    compile time and kept as ready console and file pieces. A call only
+    formats the fields, colorizes the field values, and joins the pieces,
+    then the line goes through the same veb/err filtering, prefixes,
+    date_log, counters, batching, and async handling as bp.
+
+    Example:
+        - tpl = bp_compile(['Processed ', Ct.A, '{n}', Ct.GREEN, ' rows',
+                            Ct.A])
+          tpl(n=1200)
+          tpl(n=5, veb=2)
+
+    Args:
+        - txt (list): (required) bp txt pairs whose even entries are
+                      str.format templates.
+        - num  (int): (optional) 0 = off; 1 = on (default): print blue
+                      numbers, in both the static text and the field values.
+    """
+    __slots__ = (
+        'txt',
+        'num',
+        '_con_parts',
+        '_pal_parts',
+        '_file_parts',
+        '_fields',
+        '_segments',
+        '_text',
+    )
+
+    def __init__(self, txt: list, num=1):
+        if len(txt) % 2 != 0:
+            raise Exception(
+                f'{Ct.red}"Better Print" (bp_compile) function -> "txt: '
+                f'(list): "must be in pairs (txt length = {len(txt)}){Ct.a}'
+            )
+        self.txt = list(txt)
+        self.num = num
+        con_parts = []
+        file_parts = []
+        fields = []
+        segments = []
+        # static console text is gathered here and appended as one piece
+        # whenever a field (or the end) is reached, so a call joins one piece
+        # per static run plus one per field
+        static = ''
+        auto = 0
+        for idx in range(0, len(txt), 2):
+            val = txt[idx]
+            ctxt = txt[idx + 1]
+            if not isinstance(val, str):
+                raise Exception(
+                    f'{Ct.red}"Better Print" (bp_compile) function -> "txt '
+                    f'list even entries must be str. txt type = '
+                    f'{type(val)}{Ct.a}'
+                )
+            try:
+                parsed = list(_formatter.parse(val))
+            except ValueError as e:
+                raise Exception(
+                    f'{Ct.red}"Better Print" (bp_compile) function -> '
+                    f'"invalid template {val!r}: {e}{Ct.a}'
+                ) from None
+            start = len(file_parts)
+            static += ctxt
+            for literal, name, spec, conv in parsed:
+                if literal:
+                    static += (color_numbers(literal, ctxt) if num == 1
+                               else literal)
+                    file_parts.append(literal)
+                if name is None:
+                    continue
+                if name == '':
+                    key = auto
+                    auto += 1
+                elif name.isdigit():
+                    key = int(name)
+                else:
+                    key = name
+                # attribute and index lookups fall back to str.format rules
+                simple = isinstance(key, int) or key.isidentifier()
+                if static:
+                    con_parts.append(static)
+                    static = ''
+                fields.append((len(con_parts), len(file_parts), key, simple,
+                               spec, conv, ctxt))
+                con_parts.append(None)
+                file_parts.append(None)
+            static += Ct.a
+            segments.append((start, len(file_parts), ctxt))
+        if static:
+            con_parts.append(static)
+        self._con_parts = con_parts
+        # (palette, con_parts translated to it) for bp_dict['color_depth']
+        self._pal_parts = (None, None)
+        self._file_parts = file_parts
+        self._fields = tuple(fields)
+        self._segments = tuple(segments)
+        self._text = ''.join(txt[0::2])
+
+    def render(self, *args, **kwargs) -> tuple:
+        """Fill in the fields and return the line without any prefix.
+
+        Args:
+            - *args, **kwargs: the field values.
+
+        Return:
+            - tuple: (con_out, file_out)
+        """
+        con_parts, file_parts = self._fill(args, kwargs, True, True)
+        return (''.join(con_parts), strip_ansi(''.join(file_parts)))
+
+    def __call__(self, *args, con=1, err=0, fil=1, fls=0, inl=0, log=1, veb=0,
+                 **kwargs):
+        """Better Print the template with these field values.
+
+        Args:
+            - *args, **kwargs: the field values.
+            - con, err, fil, fls, inl, log, veb: as in bp.
+
+        Return:
+            - None
+        """
+        if not bpmod._count_call(err, veb):
+            if (bpmod.bp_dict['recorder_size'] > 0
+                    and veb <= bpmod.bp_dict['recorder_verbose']):
+                file_parts = self._fill(args, kwargs, False, True)[1]
+                bpmod._record(
+                    f'{bpmod._prefix(err, log, veb)[1]}{"".join(file_parts)}')
+            return
+        # a template is one message, so in 'text' mode its layout is the key
+        if err > 0 and bpmod.bp_dict['storm_key'] and not bpmod._storm_allows(
+                err, self._text, self._text):
+            return
+        t_start = time.perf_counter_ns() if bpmod.bp_dict['stats'] == 1 else 0
+        need_con, need_file = bpmod._needs(con, err, fil)
+        need_struct = bool(bpmod.bp_dict['struct_log_file']
+                           or bpmod._sink_needs['struct'])
+        con_parts, file_parts = self._fill(args, kwargs, need_con,
+                                           need_file or need_struct)
+        con_prefix, file_prefix = bpmod._prefix(err, log, veb)
+        if need_con and '\x1b' in con_prefix:
+            pal = bpmod._palette()
+            if pal is not None:
+                con_prefix = pal.translate(con_prefix)
+        txt = None
+        if need_struct:
+            txt = []
+            for start, end, ctxt in self._segments:
+                txt.append(''.join(file_parts[start:end]))
+                txt.append(ctxt)
+        bpmod._emit(
+            f'{con_prefix}{"".join(con_parts)}' if need_con else None,
+            f'{file_prefix}{"".join(file_parts)}' if need_file else None,
+            txt, con, err, fil, fls, inl, log, veb, t_start)
+
+        return
+
+    def _fill(self, args: tuple, kwargs: dict, need_con: bool,
+              need_file: bool) -> tuple:
+        """Copy the pre-rendered pieces that are needed and drop the
+        formatted fields in; a piece list that is not needed is None."""
+        pal = None
+        num_color = Ct.bblue
+        con_parts = None
+        if need_con:
+            pal = bpmod._palette()
+            if pal is None:
+                con_parts = self._con_parts[:]
+            else:
+                num_color = pal[Ct.bblue]
+                if self._pal_parts[0] is not pal:
+                    # the static pieces are translated once per color depth
+                    self._pal_parts = (pal, [
+                        piece if piece is None else pal.translate(piece)
+                        for piece in self._con_parts])
+                con_parts = self._pal_parts[1][:]
+        file_parts = self._file_parts[:] if need_file else None
+        num = self.num
+        for con_idx, file_idx, key, simple, spec, conv, ctxt in self._fields:
+            if simple:
+                value = args[key] if isinstance(key, int) else kwargs[key]
+            else:
+                value = _formatter.get_field(key, args, kwargs)[0]
+            if conv:
+                value = _formatter.convert_field(value, conv)
+            text = value if not spec and isinstance(value, str) else format(
+                value, spec)
+            if need_file:
+                file_parts[file_idx] = text
+            if need_con:
+                if pal is not None:
+                    ctxt = pal[ctxt]
+                    text = pal.translate(text)
+                con_parts[con_idx] = (color_numbers(text, ctxt, num_color)
+                                      if num == 1 else text)
+        return (con_parts, file_parts)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def bp_compile(txt: list, num=1) -> BpTemplate:
+    """Validate and pre-render a bp txt layout for repeated use.
+
+    Example:
+        - rows = bp_compile(['Processed ', Ct.A, '{n}', Ct.GREEN, ' rows',
+                             Ct.A])
+          rows(n=1200)
+
+    Args:
+        - txt (list): (required) bp txt pairs whose even entries are
+                      str.format templates.
+        - num  (int): (optional) 0 = off; 1 = on (default): print blue numbers
+
+    Return:
+        - BpTemplate: call it with the field values and bp options
+    """
+    return BpTemplate(txt, num)
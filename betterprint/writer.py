@@ -0,0 +1,151 @@
+'''writer.py v0.1.0'''
+
+from collections import deque
+import sys
+import threading
+import traceback
+
+
+# ~~~ #                 -global variable-
+# overflow policies accepted by AsyncWriter
+OVERFLOW_POLICIES = ('block', 'drop-oldest', 'drop-verbose')
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class AsyncWriter:
+    """A bounded queue drained by one background thread.
+
+    Records are handed to write_fn in batches, in the order they were put, so
+    the output is line for line the same as writing them synchronously. Each
+    record is a tuple whose last entry is the bp veb level, used by the
+    'drop-verbose' policy.
+
+    Overflow policies when the queue is full:
+        - block:        put() waits for room (default).
+        - drop-oldest:  the oldest queued record is discarded.
+        - drop-verbose: the oldest queued veb > 0 record is discarded, or the
+                        new record itself if it is verbose; otherwise block.
+
+    A batch whose write_fn call raises is reported on stderr and counted in
+    errors; the thread goes on with the next batch.
+    """
+    __slots__ = (
+        'maxsize',
+        'policy',
+        'batch_size',
+        'dropped',
+        'errors',
+        '_write_fn',
+        '_queue',
+        '_cond',
+        '_put_count',
+        '_done_count',
+        '_closed',
+        '_thread',
+    )
+
+    def __init__(self, write_fn, maxsize=10000, policy='block',
+                 batch_size=512):
+        if policy not in OVERFLOW_POLICIES:
+            raise Exception(
+                f'AsyncWriter policy must be one of {OVERFLOW_POLICIES}. '
+                f'policy = {policy}'
+            )
+        self.maxsize = maxsize
+        self.policy = policy
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.errors = 0
+        self._write_fn = write_fn
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._put_count = 0
+        self._done_count = 0
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name='bp-writer', daemon=True)
+        self._thread.start()
+
+    def put(self, record: tuple):
+        """Queue a record for the writer thread, applying the overflow policy.
+
+        Args:
+            - record (tuple): (required) record passed on to write_fn.
+        """
+        with self._cond:
+            if self._closed:
+                raise Exception('AsyncWriter is shut down')
+            if not self._thread.is_alive():
+                raise Exception('AsyncWriter thread has stopped')
+            # the writer thread may log its own errors; never block on itself
+            if (len(self._queue) >= self.maxsize
+                    and threading.current_thread() is not self._thread):
+                if not self._make_room(record):
+                    return
+                if not self._thread.is_alive():
+                    raise Exception('AsyncWriter thread has stopped')
+            self._queue.append(record)
+            self._put_count += 1
+            self._cond.notify_all()
+
+    def flush(self):
+        """Block until every record put so far has been written."""
+        with self._cond:
+            target = self._put_count
+            if threading.current_thread() is self._thread:
+                return
+            while self._done_count < target and self._thread.is_alive():
+                self._cond.wait(0.1)
+
+    def shutdown(self):
+        """Write all queued records, then stop the writer thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def _make_room(self, record: tuple):
+        # caller must hold self._cond; return False to discard record
+        if self.policy == 'drop-oldest':
+            self._queue.popleft()
+            self._done_count += 1
+            self.dropped += 1
+            return True
+        if self.policy == 'drop-verbose':
+            if record[-1] > 0:
+                self.dropped += 1
+                return False
+            for idx, queued in enumerate(self._queue):
+                if queued[-1] > 0:
+                    del self._queue[idx]
+                    self._done_count += 1
+                    self.dropped += 1
+                    return True
+        while len(self._queue) >= self.maxsize and self._thread.is_alive():
+            self._cond.wait(0.1)
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                count = min(len(self._queue), self.batch_size)
+                batch = [self._queue.popleft() for _ in range(count)]
+                self._cond.notify_all()
+            try:
+                self._write_fn(batch)
+            except Exception:
+                self.errors += 1
+                sys.stderr.write('"Better Print" AsyncWriter -> a batch of '
+                                 f'{count} records could not be written\n')
+                traceback.print_exc()
+            finally:
+                with self._cond:
+                    self._done_count += count
+                    self._cond.notify_all()
@@ -3,8 +3,9 @@
 
 import random
 import time
-from betterprint.betterprint import bp, bp_dict
+from betterprint.betterprint import bp, bp_dict, bp_lazy
 from betterprint.colortext import Ct
+from betterprint.progress import BpProgress
 import modules.arguments as arguments
 import modules.version as version
 
@@ -12,34 +13,25 @@ import modules.version as version
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 def example_multi_bar(bar_count: int):
     """A multi-bar output example adapted from something found online. Used to
-    demonstrate how to use bp to navigate multiple lines with overwrite.
+    demonstrate how to use BpProgress to redraw multiple lines in place.
 
     Args:
         bar_count (int): number of progress bars to display
     """
-    bp([f'Create example_multi_bar using: {bar_count}:', Ct.bmagenta], veb=3)
-    prog_counter = [0] * bar_count
-    bp([f'Created prog_counter as: {prog_counter}', Ct.bmagenta],
+    bp_lazy(['Create example_multi_bar using: {}:', Ct.bmagenta], bar_count,
+            veb=3)
+    bars = BpProgress(bar_count, symbol_color=Ct.a, empty_color=Ct.black,
+                      bracket_color=Ct.grey1)
+    bp(lambda: [f'Created bars with values: {bars.values}', Ct.bmagenta],
        veb=3)
-    bp(["\n" * bar_count, Ct.black], log=0, inl=1, num=0, fil=0)
     # if any bar is less than 100, continue
-    while any(x < 100 for x in prog_counter):
+    while any(x < 100 for x in bars.values):
         time.sleep(0.01)
         # pull out any progress that are under 100
-        unfinished = [(i, v) for (i, v) in enumerate(prog_counter) if v < 100]
-        # only care about index; this allows index to not be a tuple
-        index, _ = random.choice(unfinished)
-        # increment counter
-        prog_counter[index] += 1
-        # go all the way left 1000 spaces using 'D'
-        bp(['\u001b[1000D', Ct.black], log=0, inl=1, num=0, fil=0)
-        # go to the level of the index with 'A' going up
-        bp([f'\u001b[{str(bar_count)}A', Ct.black], log=0, inl=1, num=0, fil=0)
-
-        for progress in prog_counter:
-            width = progress / 2
-            bp(['[', Ct.a, '━' * int(width), Ct.black, '─' * (50 - int(width)),
-               Ct.grey1, ']', Ct.a], inl=0, log=0, num=0, fil=0)
+        unfinished = [i for (i, v) in enumerate(bars.values) if v < 100]
+        # advance a random unfinished bar; BpProgress decides when to redraw
+        bars.advance(random.choice(unfinished))
+    bars.close()
     bp(['Finished with example_multi_bar', Ct.bmagenta], veb=3)
 
     return
@@ -60,9 +52,9 @@ def example_progress_bar(symbol='━', empty='─', symbol_color=Ct.a,
         - prog_width (int, optional): progress bar width. Defaults to 50.
     """
     bp(['Entering example_progress_bar', Ct.bmagenta], veb=3)
-    bp([f'Creating example_progress_bar using: {symbol} | {empty} | '
-        f'{symbol_color} | {empty_color} | {bracket_color} | {prog_width}',
-        Ct.bmagenta], veb=1, num=0)
+    bp_lazy(['Creating example_progress_bar using: {} | {} | {} | {} | {} | '
+             '{}', Ct.bmagenta], symbol, empty, symbol_color, empty_color,
+            bracket_color, prog_width, veb=1, num=0)
     bp(['[', bracket_color, f'{empty * prog_width}', empty_color, ']',
         bracket_color], inl=1, fls=1, log=0, fil=0)
     bp(["\b" * (prog_width + 1), Ct.a], inl=1, log=0, fil=0)
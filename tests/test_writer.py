@@ -0,0 +1,125 @@
+'''test_writer.py'''
+
+import threading
+import time
+import pytest
+from betterprint.writer import AsyncWriter
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class _Gate:
+    """write_fn that holds the writer thread until released, recording every
+    record it is given."""
+
+    def __init__(self):
+        self.written = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, batch):
+        self.entered.set()
+        self.release.wait(5)
+        self.written.extend(batch)
+
+
+def _stalled(policy, maxsize=3):
+    """An AsyncWriter whose thread is stuck on its first record, with a full
+    queue behind it."""
+    gate = _Gate()
+    writer = AsyncWriter(gate, maxsize=maxsize, policy=policy)
+    writer.put(('first', 0))
+    assert gate.entered.wait(5)
+    for idx in range(maxsize):
+        writer.put((idx, idx % 2))
+    return writer, gate
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def test_write_error_keeps_the_thread_alive(capsys):
+    written = []
+
+    def write_fn(batch):
+        if any(record[0] == 'bad' for record in batch):
+            raise UnicodeEncodeError('ascii', 'x', 0, 1, 'bad')
+        written.extend(batch)
+
+    writer = AsyncWriter(write_fn, maxsize=10, batch_size=1)
+    writer.put(('bad', 0))
+    for idx in range(100):
+        writer.put((idx, 0))
+    writer.flush()
+    writer.shutdown()
+    assert [record[0] for record in written] == list(range(100))
+    assert writer.errors == 1
+    assert writer.dropped == 0
+    assert 'could not be written' in capsys.readouterr().err
+
+
+@pytest.mark.filterwarnings(
+    'ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_put_raises_once_the_thread_has_stopped():
+    def write_fn(batch):
+        raise SystemExit
+
+    writer = AsyncWriter(write_fn, maxsize=10)
+    writer.put(('line', 0))
+    writer._thread.join(5)
+    with pytest.raises(Exception, match='stopped'):
+        writer.put(('line', 0))
+
+
+def test_block_waits_for_room():
+    writer, gate = _stalled('block')
+    done = threading.Event()
+    threading.Thread(target=lambda: (writer.put(('last', 0)), done.set()),
+                     daemon=True).start()
+    assert not done.wait(0.3)
+    gate.release.set()
+    assert done.wait(5)
+    writer.shutdown()
+    assert [record[0] for record in gate.written] == ['first', 0, 1, 2, 'last']
+    assert writer.dropped == 0
+
+
+def test_drop_oldest_discards_the_oldest_queued_record():
+    writer, gate = _stalled('drop-oldest')
+    writer.put(('last', 0))
+    gate.release.set()
+    writer.shutdown()
+    assert [record[0] for record in gate.written] == ['first', 1, 2, 'last']
+    assert writer.dropped == 1
+
+
+def test_drop_verbose_discards_verbose_records_first():
+    writer, gate = _stalled('drop-verbose')
+    # a verbose record is discarded itself
+    writer.put(('verbose', 1))
+    # a plain record makes room by discarding the oldest verbose one
+    writer.put(('plain', 0))
+    gate.release.set()
+    writer.shutdown()
+    assert [record[0] for record in gate.written] == ['first', 0, 2, 'plain']
+    assert writer.dropped == 2
+
+
+def test_drop_verbose_blocks_when_nothing_is_verbose():
+    writer, gate = _stalled('drop-verbose', maxsize=1)
+    done = threading.Event()
+    threading.Thread(target=lambda: (writer.put(('last', 0)), done.set()),
+                     daemon=True).start()
+    assert not done.wait(0.3)
+    gate.release.set()
+    assert done.wait(5)
+    writer.shutdown()
+    assert [record[0] for record in gate.written] == ['first', 0, 'last']
+    assert writer.dropped == 0
+
+
+def test_flush_waits_for_queued_records():
+    writer, gate = _stalled('block')
+    threading.Timer(0.1, gate.release.set).start()
+    start = time.monotonic()
+    writer.flush()
+    assert time.monotonic() - start >= 0.05
+    assert [record[0] for record in gate.written] == ['first', 0, 1, 2]
+    writer.shutdown()